@@ -0,0 +1,179 @@
+# Copyright (c) 2022-present, Ethan Henderson
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Per-call dispatch benchmarks for hybrid callables.
+
+Run with `python benchmarks/dispatch.py`. The async benchmarks are run
+under asyncio, and under uvloop and trio if they're installed.
+"""
+
+import asyncio
+import time
+import timeit
+import warnings
+
+import xsync
+
+N = 20_000
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore", DeprecationWarning)
+
+    @xsync.maybe_async()
+    def maybe_func(value):
+        return value
+
+    async def _async_maybe_func(value):
+        return value
+
+    class MaybeObject:
+        @xsync.maybe_async()
+        def meth(self, value):
+            return value
+
+        async def _async_meth(self, value):
+            return value
+
+
+@xsync.as_hybrid()
+def hybrid_func(value):
+    return value
+
+
+@xsync.set_async_impl(hybrid_func)
+async def async_hybrid_func(value):
+    return value
+
+
+CACHE = {"key": "value"}
+
+
+@xsync.as_hybrid()
+def cached(key):
+    return CACHE[key]
+
+
+@xsync.set_async_impl(cached)
+async def async_cached(key):
+    return CACHE[key]
+
+
+@xsync.as_hybrid(eager=True)
+def eager_cached(key):
+    return CACHE[key]
+
+
+@xsync.set_async_impl(eager_cached)
+async def async_eager_cached(key):
+    return CACHE[key]
+
+
+def report(name, seconds):
+    print(f"{name:<32} {seconds / N * 1e6:8.2f} us/call")
+
+
+def bench_sync():
+    obj = MaybeObject()
+    report("maybe_async (sync func)", timeit.timeit(lambda: maybe_func(1), number=N))
+    report("maybe_async (sync meth)", timeit.timeit(lambda: obj.meth(1), number=N))
+    report("as_hybrid (sync func)", timeit.timeit(lambda: hybrid_func(1), number=N))
+
+
+async def bench_async(backend):
+    # The hybrid calls must be on the same line as the await, so each
+    # case gets its own loop.
+    obj = MaybeObject()
+
+    start = time.perf_counter()
+    for _ in range(N):
+        await maybe_func(1)
+    report("maybe_async (async func)", time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(N):
+        await obj.meth(1)
+    report("maybe_async (async meth)", time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(N):
+        await hybrid_func(1)
+    report("as_hybrid (async func)", time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(N):
+        await cached("key")
+    report("cache hit (await)", time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(N):
+        await eager_cached("key")
+    report("cache hit (eager await)", time.perf_counter() - start)
+
+    if backend == "trio":
+        # Trio has no equivalent to gathering awaitables.
+        return
+
+    start = time.perf_counter()
+    for _ in range(N // 10):
+        await asyncio.gather(*[cached("key") for _ in range(10)])
+    report("cache hit (gather)", time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(N // 10):
+        await asyncio.gather(*[eager_cached("key") for _ in range(10)])
+    report("cache hit (eager gather)", time.perf_counter() - start)
+
+
+def run_async():
+    print("\nasyncio")
+    asyncio.run(bench_async("asyncio"))
+
+    try:
+        import uvloop
+    except ImportError:
+        print("\nuvloop is not installed")
+    else:
+        print("\nuvloop")
+        loop = uvloop.new_event_loop()
+        try:
+            loop.run_until_complete(bench_async("uvloop"))
+        finally:
+            loop.close()
+
+    try:
+        import trio
+    except ImportError:
+        print("\ntrio is not installed")
+    else:
+        print("\ntrio")
+        trio.run(bench_async, "trio")
+
+
+if __name__ == "__main__":
+    bench_sync()
+    run_async()
@@ -0,0 +1,465 @@
+# Copyright (c) 2022-present, Ethan Henderson
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Load and correctness harness for hybrid callables.
+
+Drives thousands of concurrent tasks and threads through `as_hybrid`,
+`maybe_async` and `AsyncInitMixin` against local stand-in backends with
+injected latency, checks every result, and compares throughput, latency
+percentiles, event loop lag and RSS growth against the thresholds in
+`benchmarks/load_thresholds.json`.
+
+Run with `nox -s load` or `python benchmarks/load.py`. Pass `--scale` to
+change the amount of work, and `--update` to store the observed figures
+(with some headroom) as the new thresholds.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import threading
+import time
+import warnings
+from pathlib import Path
+
+import xsync
+from xsync import hybrid
+
+THRESHOLDS = Path(__file__).parent / "load_thresholds.json"
+
+TASKS = 5_000
+THREADS = 32
+CALLS_PER_THREAD = 200
+ROUNDS = 3
+LATENCY = (0.0005, 0.005)
+LAG_INTERVAL = 0.005
+BATCH = 100
+
+
+def latency():
+    return random.uniform(*LATENCY)
+
+
+class Backend:
+    """A stand-in for a remote service, which echoes requests back after
+    a short delay.
+    """
+
+    def get(self, key):
+        time.sleep(latency())
+        return ("sync", key)
+
+    async def async_get(self, key):
+        await asyncio.sleep(latency())
+        return ("async", key)
+
+
+BACKEND = Backend()
+
+
+@xsync.as_hybrid()
+def fetch(key):
+    return BACKEND.get(key)
+
+
+@xsync.set_async_impl(fetch)
+async def async_fetch(key):
+    return await BACKEND.async_get(key)
+
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore", DeprecationWarning)
+
+    class Client:
+        @xsync.maybe_async()
+        def fetch(self, key):
+            return BACKEND.get(key)
+
+        async def _async_fetch(self, key):
+            return await BACKEND.async_get(key)
+
+
+CLIENT = Client()
+
+
+class Component(xsync.AsyncInitMixin):
+    def __init__(self, key, *, tag):
+        time.sleep(latency())
+        self.key = ("sync", key, tag)
+
+    async def __ainit__(self, key, *, tag):
+        await asyncio.sleep(latency())
+        self.key = ("async", key, tag)
+
+
+def hybrid_factory(n):
+    # Hybrids defined in a closure are registered under the same name
+    # each time, so the registry shouldn't grow with the call count.
+    @xsync.as_hybrid()
+    def local(key):
+        return ("sync", key, n)
+
+    @xsync.set_async_impl(local)
+    async def async_local(key):
+        return ("async", key, n)
+
+    return local
+
+
+class LagMonitor:
+    """Measures how late the event loop wakes up from short sleeps."""
+
+    def __init__(self):
+        self.lags = []
+        self._task = None
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(LAG_INTERVAL)
+            self.lags.append(time.perf_counter() - start - LAG_INTERVAL)
+
+    async def __aenter__(self):
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, *exc):
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+
+class Result:
+    # Shared by threads and tasks in the mixed scenarios.
+    def __init__(self, name):
+        self.name = name
+        self.latencies = []
+        self.lags = []
+        self.elapsed = 0.0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def record(self, latency):
+        with self._lock:
+            self.latencies.append(latency)
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def percentile(self, values, pct):
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+    def as_dict(self):
+        return {
+            "ops": len(self.latencies),
+            "throughput": len(self.latencies) / self.elapsed if self.elapsed else 0.0,
+            "p50_ms": self.percentile(self.latencies, 50) * 1000,
+            "p99_ms": self.percentile(self.latencies, 99) * 1000,
+            "loop_lag_p99_ms": self.percentile(self.lags, 99) * 1000,
+            "loop_lag_max_ms": max(self.lags, default=0.0) * 1000,
+            "errors": self.errors,
+        }
+
+
+def check(result, value, expected):
+    if value != expected:
+        result.record_error()
+        print(f"  {result.name}: expected {expected!r}, got {value!r}")
+
+
+async def timed_async(result, make, expected):
+    start = time.perf_counter()
+    value = await make()
+    result.record(time.perf_counter() - start)
+    check(result, value, expected)
+
+
+def timed_sync(result, make, expected):
+    start = time.perf_counter()
+    value = make()
+    result.record(time.perf_counter() - start)
+    check(result, value, expected)
+
+
+async def spawn(result, job):
+    # Tasks are started in batches, as requests would arrive, rather
+    # than all in one go, which would stall the loop by itself.
+    tasks = []
+    for i in range(TASKS):
+        tasks.append(asyncio.create_task(job(result, i)))
+        if i % BATCH == BATCH - 1:
+            await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+
+
+async def run_tasks(result, job):
+    async with LagMonitor() as monitor:
+        start = time.perf_counter()
+        await spawn(result, job)
+        result.elapsed = time.perf_counter() - start
+    result.lags = monitor.lags
+
+
+def drive(result, job):
+    def worker(n):
+        for i in range(CALLS_PER_THREAD):
+            job(result, n * CALLS_PER_THREAD + i)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+async def run_threads(result, job):
+    # The threads are joined in an executor so the loop isn't blocked
+    # while they run.
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    await loop.run_in_executor(None, drive, result, job)
+    result.elapsed = time.perf_counter() - start
+
+
+async def run_mixed(result, task_job, thread_job):
+    # Threads take the sync path while tasks on the loop take the async
+    # one, at the same time, both recording into the same result.
+    loop = asyncio.get_running_loop()
+    async with LagMonitor() as monitor:
+        start = time.perf_counter()
+        await asyncio.gather(
+            loop.run_in_executor(None, drive, result, thread_job),
+            spawn(result, task_job),
+        )
+        result.elapsed = time.perf_counter() - start
+    result.lags = monitor.lags
+
+
+async def hybrid_task(result, i):
+    await timed_async(result, lambda: fetch(i), ("async", i))
+
+
+def hybrid_thread(result, i):
+    timed_sync(result, lambda: fetch(i), ("sync", i))
+
+
+async def maybe_async_task(result, i):
+    await timed_async(result, lambda: CLIENT.fetch(i), ("async", i))
+
+
+def maybe_async_thread(result, i):
+    timed_sync(result, lambda: CLIENT.fetch(i), ("sync", i))
+
+
+async def init_task(result, i):
+    start = time.perf_counter()
+    obj = await Component(i, tag=-i)
+    result.record(time.perf_counter() - start)
+    check(result, obj.key, ("async", i, -i))
+
+
+def init_thread(result, i):
+    timed_sync(result, lambda: Component(i, tag=-i).key, ("sync", i, -i))
+
+
+async def closure_task(result, i):
+    local = hybrid_factory(i)
+    start = time.perf_counter()
+    value = await local(i)
+    result.record(time.perf_counter() - start)
+    check(result, value, ("async", i, i))
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        import os
+
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1024**2
+    except OSError:
+        import resource
+
+        # Peak rather than current usage, in kilobytes on Linux and
+        # bytes on macOS.
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss / (1024**2 if sys.platform == "darwin" else 1024)
+
+
+async def run_round():
+    results = []
+
+    for name, job in (
+        ("as_hybrid tasks", hybrid_task),
+        ("maybe_async tasks", maybe_async_task),
+        ("AsyncInitMixin tasks", init_task),
+        ("closure hybrid tasks", closure_task),
+    ):
+        result = Result(name)
+        await run_tasks(result, job)
+        results.append(result)
+
+    for name, job in (
+        ("as_hybrid threads", hybrid_thread),
+        ("maybe_async threads", maybe_async_thread),
+        ("AsyncInitMixin threads", init_thread),
+    ):
+        result = Result(name)
+        await run_threads(result, job)
+        results.append(result)
+
+    for name, task_job, thread_job in (
+        ("as_hybrid mixed", hybrid_task, hybrid_thread),
+        ("AsyncInitMixin mixed", init_task, init_thread),
+    ):
+        result = Result(name)
+        await run_mixed(result, task_job, thread_job)
+        results.append(result)
+
+    return results
+
+
+def compare(report, thresholds, scaled):
+    failures = []
+
+    for name, figures in report["scenarios"].items():
+        if figures["errors"]:
+            failures.append(f"{name}: {figures['errors']} incorrect result(s)")
+
+        # Throughput depends on the amount of work, so is only compared
+        # at the scale the thresholds were stored at.
+        limits = thresholds["scenarios"].get(name, {})
+        if not scaled and figures["throughput"] < limits.get("min_throughput", 0):
+            failures.append(
+                f"{name}: throughput {figures['throughput']:,.0f} ops/s is below "
+                f"{limits['min_throughput']:,.0f}"
+            )
+        for key in ("p99_ms", "loop_lag_p99_ms"):
+            limit = limits.get(f"max_{key}")
+            if limit is not None and figures[key] > limit:
+                failures.append(f"{name}: {key} {figures[key]:.2f} is above {limit}")
+
+    for key in ("rss_growth_mb", "registry_growth", "blocking_sites"):
+        limit = thresholds.get(f"max_{key}")
+        if limit is not None and report[key] > limit:
+            failures.append(f"{key} {report[key]:.2f} is above {limit}")
+
+    return failures
+
+
+def updated_thresholds(report):
+    # Leave plenty of headroom, as shared CI machines are noisy.
+    return {
+        "scenarios": {
+            name: {
+                "min_throughput": round(figures["throughput"] / 3),
+                "max_p99_ms": round(figures["p99_ms"] * 3 + 5, 1),
+                "max_loop_lag_p99_ms": round(figures["loop_lag_p99_ms"] * 3 + 5, 1),
+            }
+            for name, figures in report["scenarios"].items()
+        },
+        "max_rss_growth_mb": round(max(report["rss_growth_mb"] * 3, 20), 1),
+        "max_registry_growth": 0,
+        "max_blocking_sites": 0,
+    }
+
+
+def main():
+    global TASKS, THREADS
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--update", action="store_true")
+    args = parser.parse_args()
+
+    TASKS = max(1, int(TASKS * args.scale))
+    THREADS = max(1, int(THREADS * args.scale))
+    print(f"Python {sys.version.split()[0]}, {TASKS:,} tasks, {THREADS} threads")
+
+    xsync.enable_blocking_detection(threshold=0.05)
+    rss = []
+    registry = []
+
+    for n in range(ROUNDS):
+        results = asyncio.run(run_round())
+        rss.append(rss_mb())
+        registry.append(len(hybrid._mapping))
+        print(f"Round {n + 1}: {rss[-1]:.1f} MiB RSS, {registry[-1]} registered")
+
+    # The first round warms up caches and pools, so growth is measured
+    # from the end of it.
+    report = {
+        "scenarios": {r.name: r.as_dict() for r in results},
+        "rss_growth_mb": rss[-1] - rss[0],
+        "registry_growth": registry[-1] - registry[0],
+        "blocking_sites": len(xsync.blocking_report()),
+    }
+
+    print()
+    print(
+        f"{'Scenario':<24} {'ops/s':>10} {'p50 ms':>8} {'p99 ms':>8} "
+        f"{'lag p99':>8} {'lag max':>8}"
+    )
+    for name, f in report["scenarios"].items():
+        print(
+            f"{name:<24} {f['throughput']:>10,.0f} {f['p50_ms']:>8.3f} "
+            f"{f['p99_ms']:>8.3f} {f['loop_lag_p99_ms']:>8.2f} "
+            f"{f['loop_lag_max_ms']:>8.2f}"
+        )
+    print(
+        f"\nRSS growth {report['rss_growth_mb']:.2f} MiB, registry growth "
+        f"{report['registry_growth']}, blocking call sites {report['blocking_sites']}"
+    )
+
+    if args.update:
+        with open(THRESHOLDS, "w") as f:
+            json.dump(updated_thresholds(report), f, indent=2)
+            f.write("\n")
+        print(f"Updated {THRESHOLDS.name}")
+        return 0
+
+    with open(THRESHOLDS) as f:
+        failures = compare(report, json.load(f), args.scale != 1)
+
+    if failures:
+        print("\nFAILED:\n" + "\n".join(f" - {failure}" for failure in failures))
+        return 1
+
+    print("\nAll thresholds met")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+# Copyright (c) 2022-present, Ethan Henderson
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Multi-threaded scaling benchmarks for hybrid dispatch.
+
+Run with `python benchmarks/threads.py`. Throughput is only expected to
+rise with the thread count on free-threaded builds of CPython.
+"""
+
+import sys
+import threading
+import time
+
+import xsync
+
+CALLS = 50_000
+THREADS = (1, 2, 4, 8)
+
+
+@xsync.as_hybrid()
+def func(value):
+    return value
+
+
+@xsync.set_async_impl(func)
+async def async_func(value):
+    return value
+
+
+class Component(xsync.AsyncInitMixin):
+    def __init__(self, value):
+        self.value = value
+
+
+def call_hybrid():
+    for i in range(CALLS):
+        func(i)
+
+
+def init_component():
+    for i in range(CALLS):
+        Component(i)
+
+
+def register_hybrids():
+    for _ in range(CALLS // 100):
+
+        @xsync.as_hybrid()
+        def local(): ...
+
+        @xsync.set_async_impl(local)
+        async def async_local(): ...
+
+
+def run(target, n):
+    threads = [threading.Thread(target=target) for _ in range(n)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"Python {sys.version.split()[0]}, GIL {'enabled' if gil else 'disabled'}")
+
+    for target in (call_hybrid, init_component, register_hybrids):
+        print(f"\n{target.__name__}")
+        for n in THREADS:
+            elapsed = run(target, n)
+            calls = CALLS if target is not register_hybrids else CALLS // 100
+            print(f"{n:>3} threads {calls * n / elapsed:>14,.0f} ops/s")
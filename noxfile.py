@@ -85,6 +85,12 @@ def tests(session: nox.Session) -> None:
     session.run("coverage", "report", "-m")
 
 
+@nox.session(reuse_venv=True)
+def load(session: nox.Session) -> None:
+    session.install(".")
+    session.run("python", "benchmarks/load.py", *session.posargs)
+
+
 @nox.session(reuse_venv=True)
 def formatting(session: nox.Session) -> None:
     session.install(*fetch_installs("Formatting"))
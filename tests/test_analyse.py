@@ -0,0 +1,239 @@
+# Copyright (c) 2022-present, Ethan Henderson
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import asyncio
+import importlib
+import json
+import sys
+import textwrap
+
+import pytest
+
+import xsync
+from xsync import utils
+from xsync.analyse import analyse, main
+
+MODULE = textwrap.dedent("""
+    import asyncio
+    import contextlib
+
+    import xsync
+
+
+    @xsync.as_hybrid()
+    def fetch(key):
+        return ("sync", key)
+
+
+    @xsync.set_async_impl(fetch)
+    async def async_fetch(key):
+        return ("async", key)
+
+
+    @xsync.as_hybrid()
+    def orphan():
+        ...
+
+
+    class Component(xsync.AsyncInitMixin):
+        async def __ainit__(self):
+            self.ready = True
+
+
+    @xsync.hybrid_class()
+    class Client:
+        def get(self):
+            return "sync"
+
+        async def async_get(self):
+            return "async"
+
+        @xsync.as_hybrid()
+        def put(self):
+            return "sync"
+
+        async def async_put(self):
+            return "async"
+
+
+    @xsync.hybrid_class(prefix="", suffix="_async")
+    class Store:
+        def load(self):
+            return "sync"
+
+        async def load_async(self):
+            return "async"
+
+
+    @xsync.as_hybrid()
+    @contextlib.contextmanager
+    def connect():
+        yield "sync"
+
+
+    @xsync.set_async_impl(connect)
+    @contextlib.asynccontextmanager
+    async def async_connect():
+        yield "async"
+
+
+    async def main():
+        a = await (
+            fetch(1)
+        )
+        b = await asyncio.gather(*(fetch(i) for i in range(2)))
+        task = asyncio.create_task(fetch(3))
+        c = await task
+        d = fetch(4)  # await is only mentioned here
+        e = [await fetch(i) for i in range(1)]
+        f = await Component()
+        g = await Client(
+        ).get()
+        async with connect() as h:
+            pass
+        i = await Store().load()
+        return a, b, c, d, e, f.ready, g, h, i
+    """)
+
+
+@pytest.fixture()
+def package(tmp_path, monkeypatch):
+    root = tmp_path / "analyse_demo"
+    root.mkdir()
+    (root / "__init__.py").write_text("")
+    (root / "mod.py").write_text(MODULE)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(utils, "_index", None)
+    yield root
+    sys.modules.pop("analyse_demo.mod", None)
+    sys.modules.pop("analyse_demo", None)
+    utils._awaited.clear()
+
+
+def line(text):
+    lines = MODULE.splitlines()
+    return next(n for n, source in enumerate(lines, 1) if text in source)
+
+
+def sites_by_line(analysis):
+    return {site.line: site for site in analysis.sites}
+
+
+def test_classifies_call_sites(package):
+    analysis = analyse(str(package))
+    sites = sites_by_line(analysis)
+
+    assert analysis.package == "analyse_demo"
+    assert analysis.files == 2
+    assert len(sites) == 8
+
+    multi_line = sites[line("fetch(1)")]
+    assert multi_line.awaited and not multi_line.detected
+
+    gathered = sites[line("gather")]
+    assert gathered.awaited and gathered.qualname == "main.<locals>.<genexpr>"
+
+    task = sites[line("create_task")]
+    assert task.awaited and not task.detected
+
+    comment = sites[line("d = fetch(4)")]
+    assert not comment.awaited and comment.detected
+
+    # List comprehensions are inlined from Python 3.12.
+    listcomp = "main" if sys.version_info >= (3, 12) else "main.<locals>.<listcomp>"
+    assert sites[line("e = [")].qualname == listcomp
+    assert sites[line("Component()")].awaited
+    assert sites[line(").get()")].callee == "get"
+    assert line("async with connect()") not in sites
+    assert sites[line("Store().load()")].callee == "load"
+
+    assert {site.line for site in analysis.misdetected} == {
+        line("fetch(1)"),
+        line("create_task"),
+        line("d = fetch(4)"),
+        line(").get()"),
+    }
+
+
+def test_finds_missing_impls(package):
+    analysis = analyse("analyse_demo")
+
+    assert [(m.name, m.line) for m in analysis.missing] == [
+        ("orphan", line("def orphan"))
+    ]
+
+
+def test_cli(package, tmp_path, capsys):
+    output = tmp_path / "index.json"
+
+    assert main([str(package), "-o", str(output)]) == 1
+    assert "orphan" in capsys.readouterr().out
+
+    index = json.loads(output.read_text())
+    assert index["package"] == "analyse_demo"
+    assert ["analyse_demo/mod.py", "main", line("d = fetch(4)"), False] in index[
+        "sites"
+    ]
+
+
+def test_index_fixes_dispatch(package, tmp_path):
+    output = tmp_path / "index.json"
+    main([str(package), "-o", str(output)])
+    mod = importlib.import_module("analyse_demo.mod")
+
+    with pytest.raises(TypeError):
+        asyncio.run(mod.main())
+
+    assert xsync.load_dispatch_index(output) == 8
+    a, b, c, d, e, ready, g, h, i = asyncio.run(mod.main())
+    assert a == ("async", 1)
+    assert b == [("async", 0), ("async", 1)]
+    assert c == ("async", 3)
+    assert d == ("sync", 4)
+    assert e == [("async", 0)]
+    assert ready
+    assert g == "async"
+    assert h == "async"
+    assert i == "async"
+
+
+def test_index_for_another_python(package, tmp_path):
+    output = tmp_path / "index.json"
+    main([str(package), "-o", str(output)])
+
+    index = json.loads(output.read_text())
+    index["python"] = "2.7"
+    output.write_text(json.dumps(index))
+
+    assert xsync.load_dispatch_index(output) == 0
+    assert utils._index is None
+
+
+def test_unknown_package(capsys):
+    with pytest.raises(SystemExit):
+        main(["not_a_real_package_name"])
@@ -26,6 +26,9 @@
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
 import xsync
 
 
@@ -62,3 +65,61 @@ async def test_async_init():
 async def test_async_init_none_available():
     n = await NoAsyncInit()
     assert hasattr(n.__class__, "__ainit__")
+
+
+class KwargsObject(xsync.AsyncInitMixin):
+    def __init__(self, value, *, extra=None):
+        self.values = (value, extra)
+
+    async def __ainit__(self, value, *, extra=None):
+        await asyncio.sleep(0)
+        self.values = (value, extra)
+
+
+class SubObject(MockObject):
+    pass
+
+
+def test_sync_init_repeated():
+    ms = [MockObject(i) for i in range(5)]
+    assert [m.unique for m in ms] == list(range(5))
+
+
+async def test_async_init_kwargs():
+    k = await KwargsObject(1, extra=2)
+    assert k.values == (1, 2)
+    assert not hasattr(k, "_xsync_init_args")
+
+
+async def test_async_init_concurrent():
+    async def create(i):
+        return await KwargsObject(i, extra=-i)
+
+    ks = await asyncio.gather(*(create(i) for i in range(50)))
+    assert [k.values for k in ks] == [(i, -i) for i in range(50)]
+
+
+async def test_subclass_init():
+    assert SubObject(1).unique == 1
+    s = await SubObject(2)
+    assert s.individual == 2
+
+
+def test_init_across_threads():
+    def work(offset):
+        async def create(i):
+            return await KwargsObject(i, extra=offset)
+
+        async def main():
+            return await asyncio.gather(*(create(i) for i in range(20)))
+
+        sync = [KwargsObject(i, extra=offset).values for i in range(20)]
+        return sync, [k.values for k in asyncio.run(main())]
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(work, range(16)))
+
+    for offset, (sync, async_) in enumerate(results):
+        expected = [(i, offset) for i in range(20)]
+        assert sync == expected
+        assert async_ == expected
@@ -0,0 +1,199 @@
+# Copyright (c) 2022-present, Ethan Henderson
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import asyncio
+import threading
+import time
+
+import pytest
+import trio
+
+import xsync
+from xsync import backends
+from xsync.errors import DeadlineExceeded
+
+
+@xsync.as_hybrid(timeout=0.05)
+def slow(seconds):
+    return "sync"
+
+
+@xsync.set_async_impl(slow)
+async def async_slow(seconds):
+    await trio.sleep(seconds)
+    return "trio"
+
+
+@xsync.as_hybrid(eager=True)
+def cached(key):
+    return "sync"
+
+
+@xsync.set_async_impl(cached)
+async def async_cached(key):
+    if key is None:
+        raise KeyError(key)
+    return key
+
+
+class Component(xsync.AsyncInitMixin):
+    async def __ainit__(self, value):
+        await trio.sleep(0)
+        self.value = value
+
+
+def test_detection():
+    async def detect():
+        return backends.current().name
+
+    assert asyncio.run(detect()) == "asyncio"
+    assert trio.run(detect) == "trio"
+
+    with pytest.raises(RuntimeError):
+        backends.current()
+
+
+@pytest.mark.parametrize("run", [lambda f: asyncio.run(f()), trio.run])
+def test_to_thread(run):
+    main = threading.get_ident()
+
+    async def offload():
+        return await xsync.to_thread(threading.get_ident)
+
+    assert run(offload) != main
+
+
+def test_timeouts_under_trio():
+    async def main():
+        assert await slow(0) == "trio"
+        with pytest.raises(DeadlineExceeded):
+            await slow(1)
+
+    trio.run(main)
+
+
+def test_eager_under_trio():
+    async def main():
+        assert await cached("key") == "key"
+        with pytest.raises(KeyError):
+            await cached(None)
+
+    trio.run(main)
+
+
+def test_async_init_under_trio():
+    async def main():
+        return (await Component(1)).value
+
+    assert trio.run(main) == 1
+
+
+def test_limiter_under_trio():
+    limiter = xsync.Limiter(limit=2)
+    active = []
+    peak = []
+
+    async def task():
+        async with limiter:
+            active.append(1)
+            peak.append(len(active))
+            await trio.sleep(0.01)
+            active.pop()
+
+    def thread():
+        with limiter:
+            time.sleep(0.01)
+
+    async def main():
+        async with trio.open_nursery() as nursery:
+            for _ in range(6):
+                nursery.start_soon(task)
+            await trio.to_thread.run_sync(thread)
+
+    trio.run(main)
+    assert max(peak) <= 2
+    assert limiter.in_use == 0
+    assert limiter.acquisitions == 7
+
+
+def test_limiter_timeout_under_trio():
+    limiter = xsync.Limiter(limit=1)
+    limiter.acquire()
+
+    async def main():
+        return await limiter.acquire_async(timeout=0.02)
+
+    assert trio.run(main) is False
+    limiter.release()
+
+
+def test_hedging_under_trio():
+    calls = []
+
+    @xsync.as_hybrid(hedge_after=0.02, max_hedges=2)
+    def fetch(): ...
+
+    @xsync.set_async_impl(fetch)
+    async def async_fetch():
+        calls.append(1)
+        await trio.sleep(0.1 if len(calls) == 1 else 0)
+        return len(calls)
+
+    async def main():
+        return await fetch()
+
+    assert trio.run(main) == 2
+    stats = xsync.get_stats(fetch)
+    assert stats.hedges == 1
+    assert stats.hedge_wins == 1
+
+
+def test_hedging_failures_under_trio():
+    @xsync.as_hybrid(hedge_after=1)
+    def fetch(): ...
+
+    @xsync.set_async_impl(fetch)
+    async def async_fetch():
+        raise ValueError("failed")
+
+    async def main():
+        await fetch()
+
+    start = time.monotonic()
+    with pytest.raises(ValueError):
+        trio.run(main)
+    assert time.monotonic() - start < 0.5
+
+
+def test_new_event_loop_uses_uvloop():
+    uvloop = pytest.importorskip("uvloop")
+    loop = backends.new_event_loop()
+    try:
+        assert isinstance(loop, uvloop.Loop)
+    finally:
+        loop.close()
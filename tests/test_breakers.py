@@ -0,0 +1,207 @@
+# Copyright (c) 2022-present, Ethan Henderson
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+import xsync
+from xsync.errors import CircuitOpen, LoadShed
+
+
+def make_hybrid(breaker, **options):
+    calls = []
+
+    @xsync.as_hybrid(breaker=breaker, **options)
+    def backend(key, outcome="ok", delay=0):
+        calls.append(("sync", key))
+        time.sleep(delay)
+        if outcome != "ok":
+            raise OSError(outcome)
+        return "sync"
+
+    @xsync.set_async_impl(backend)
+    async def async_backend(key, outcome="ok", delay=0):
+        calls.append(("async", key))
+        await asyncio.sleep(delay)
+        if outcome != "ok":
+            raise OSError(outcome)
+        return "async"
+
+    return backend, calls
+
+
+def fail(backend, n, key="a"):
+    for _ in range(n):
+        with pytest.raises(OSError):
+            backend(key, "down")
+
+
+async def test_opens_on_failures_for_both_paths():
+    breaker = xsync.CircuitBreaker(window=4, min_calls=4, reset_timeout=60)
+    backend, calls = make_hybrid(breaker)
+
+    assert backend("a") == "sync"
+    fail(backend, 2)
+    assert breaker.state() == "closed"
+
+    fail(backend, 1)
+    assert breaker.state() == "open"
+    calls.clear()
+
+    with pytest.raises(CircuitOpen) as exc_info:
+        backend("a")
+    with pytest.raises(CircuitOpen):
+        await backend("a")
+
+    assert calls == []
+    assert 59 < exc_info.value.retry_after <= 60
+    assert breaker.rejected == 2
+
+
+async def test_half_open_probe_closes():
+    breaker = xsync.CircuitBreaker(window=2, min_calls=2, reset_timeout=0.05)
+    backend, _ = make_hybrid(breaker)
+    fail(backend, 2)
+    assert breaker.state() == "open"
+
+    await asyncio.sleep(0.06)
+    assert await backend("a") == "async"
+    assert breaker.state() == "closed"
+
+    states = [(old, new) for _, _, old, new in breaker.transitions]
+    assert states == [
+        ("closed", "open"),
+        ("open", "half_open"),
+        ("half_open", "closed"),
+    ]
+
+
+def test_half_open_probe_failure_reopens():
+    breaker = xsync.CircuitBreaker(window=2, min_calls=2, reset_timeout=0.05)
+    backend, _ = make_hybrid(breaker)
+    fail(backend, 2)
+
+    time.sleep(0.06)
+    fail(backend, 1)
+    assert breaker.state() == "open"
+
+    with pytest.raises(CircuitOpen):
+        backend("a")
+
+
+async def test_only_allowed_probes_run():
+    breaker = xsync.CircuitBreaker(window=2, min_calls=2, reset_timeout=0.01)
+    backend, _ = make_hybrid(breaker)
+    fail(backend, 2)
+    await asyncio.sleep(0.02)
+
+    async def call(delay):
+        return await backend("a", delay=delay)
+
+    results = await asyncio.gather(call(0.02), call(0), return_exceptions=True)
+    assert results[0] == "async"
+    assert isinstance(results[1], CircuitOpen)
+    assert breaker.state() == "closed"
+
+
+def test_opens_on_slow_calls():
+    breaker = xsync.CircuitBreaker(slow_call=0.01, window=2, min_calls=2)
+    backend, _ = make_hybrid(breaker)
+
+    backend("a", delay=0.02)
+    backend("a", delay=0.02)
+    assert breaker.state() == "open"
+
+
+def test_circuit_per_key():
+    breaker = xsync.CircuitBreaker(window=2, min_calls=2, key=lambda key, *_: key)
+    backend, _ = make_hybrid(breaker)
+    fail(backend, 2, key="a")
+
+    assert breaker.state("a") == "open"
+    assert breaker.state("b") == "closed"
+    assert backend("b") == "sync"
+
+    with pytest.raises(CircuitOpen):
+        backend("a")
+
+
+def test_ignored_failures():
+    breaker = xsync.CircuitBreaker(
+        window=2, min_calls=2, failure_types=(ConnectionError,)
+    )
+    backend, _ = make_hybrid(breaker)
+    fail(backend, 4)
+
+    assert breaker.state() == "closed"
+
+
+async def test_load_shedding():
+    breaker = xsync.CircuitBreaker(window=2, min_calls=2, shed_after=0.02)
+    backend, _ = make_hybrid(breaker, limit=1)
+
+    thread = threading.Thread(target=backend, args=("a", "ok", 0.1))
+    thread.start()
+    time.sleep(0.01)
+
+    with pytest.raises(LoadShed):
+        backend("b")
+    with pytest.raises(LoadShed):
+        await backend("c")
+
+    thread.join()
+    assert breaker.shed == 2
+    assert breaker.state() == "closed"
+    assert backend("d") == "sync"
+
+
+def test_shedding_needs_a_limiter():
+    with pytest.raises(ValueError):
+        make_hybrid(xsync.CircuitBreaker(shed_after=1))
+
+
+def test_stats():
+    breaker = xsync.CircuitBreaker(window=2, min_calls=2)
+    backend, _ = make_hybrid(breaker)
+    fail(backend, 2)
+
+    stats = xsync.get_stats(backend).as_dict()["breaker"]
+    assert stats["circuits"] == 1
+    assert stats["open"] == 1
+    assert stats["transitions"][0][2:] == ("closed", "open")
+
+
+def test_invalid_options():
+    with pytest.raises(ValueError):
+        xsync.CircuitBreaker(failure_rate=0)
+
+    with pytest.raises(ValueError):
+        xsync.CircuitBreaker(window=0)
@@ -0,0 +1,203 @@
+# Copyright (c) 2022-present, Ethan Henderson
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import asyncio
+
+import pytest
+
+import xsync
+from xsync.errors import DependencyError
+
+events = []
+
+
+class Config(xsync.AsyncInitMixin):
+    def __init__(self):
+        self.sync = True
+
+    async def __ainit__(self):
+        await asyncio.sleep(0.02)
+        self.url = "db://"
+        events.append("config")
+
+    async def aclose(self):
+        events.append("close config")
+
+
+class Pool(xsync.AsyncInitMixin):
+    def __init__(self, config):
+        ...
+
+    async def __ainit__(self, config):
+        await asyncio.sleep(0.05)
+        self.url = config.url
+        events.append("pool")
+
+    def close(self):
+        events.append("close pool")
+
+
+class Cache(xsync.AsyncInitMixin):
+    def __init__(self, config):
+        ...
+
+    async def __ainit__(self, config):
+        await asyncio.sleep(0.05)
+        self.config = config
+        events.append("cache")
+
+    async def aclose(self):
+        await asyncio.sleep(0)
+        events.append("close cache")
+
+
+class Client(xsync.AsyncInitMixin):
+    def __init__(self, pool, cache, name="client"):
+        ...
+
+    async def __ainit__(self, pool, cache, name="client"):
+        self.pool = pool
+        self.name = name
+        events.append("client")
+
+    async def aclose(self):
+        events.append("close client")
+
+
+class Broken(xsync.AsyncInitMixin):
+    async def __ainit__(self):
+        await asyncio.sleep(0.03)
+        raise RuntimeError("handshake failed")
+
+
+def make_container():
+    events.clear()
+    container = xsync.Container()
+    container.add(Config)
+    container.add(Pool, depends_on={"config": Config})
+    container.add(Cache, depends_on={"config": Config})
+    container.add(Client, depends_on={"pool": Pool, "cache": Cache}, name="api")
+    return container
+
+
+async def test_start_and_inject():
+    container = make_container()
+    await container.start()
+
+    client = container[Client]
+    assert client.name == "api"
+    assert client.pool is container[Pool]
+    assert client.pool.url == "db://"
+    assert events.index("config") < events.index("pool") < events.index("client")
+    assert events.index("cache") < events.index("client")
+
+
+async def test_independent_components_start_concurrently():
+    container = make_container()
+    report = await container.start()
+
+    pool = report.timings["Pool"]
+    cache = report.timings["Cache"]
+    assert pool[0] < cache[1] and cache[0] < pool[1]
+    assert report.total < 0.11
+
+
+async def test_report_critical_path():
+    container = make_container()
+    report = await container.start()
+
+    assert report.critical_path[0] == "Config"
+    assert report.critical_path[-1] == "Client"
+    assert len(report.critical_path) == 3
+    assert "Critical path: Config -> " in str(report)
+
+
+async def test_stop_in_reverse_order():
+    container = make_container()
+    async with container:
+        events.clear()
+
+    assert events[0] == "close client"
+    assert events[-1] == "close config"
+    assert set(events[1:3]) == {"close pool", "close cache"}
+
+    with pytest.raises(KeyError):
+        container[Client]
+
+
+async def test_ordering_only_dependencies():
+    events.clear()
+    container = xsync.Container()
+    container.add(Config)
+    container.add(Cache, Config(), depends_on=[Config])
+    await container.start()
+
+    assert events == ["config", "cache"]
+    assert container[Cache].config.sync
+
+
+async def test_failure_tears_down_started_components():
+    events.clear()
+    container = xsync.Container()
+    container.add(Config)
+    container.add(Broken)
+    container.add(Pool, depends_on={"config": Config})
+
+    with pytest.raises(RuntimeError, match="handshake failed"):
+        await container.start()
+
+    assert "pool" not in events
+    assert "close config" in events
+    with pytest.raises(KeyError):
+        container[Config]
+
+
+def test_missing_dependency():
+    container = xsync.Container()
+    container.add(Pool, depends_on={"config": Config})
+
+    with pytest.raises(DependencyError, match="has not been added"):
+        asyncio.run(container.start())
+
+
+def test_dependency_cycle():
+    container = xsync.Container()
+    container.add(Pool, depends_on=[Cache])
+    container.add(Cache, depends_on=[Client])
+    container.add(Client, depends_on=[Pool])
+
+    with pytest.raises(DependencyError, match="Pool -> Cache -> Client -> Pool"):
+        asyncio.run(container.start())
+
+
+def test_duplicate_component():
+    container = xsync.Container()
+    container.add(Config)
+
+    with pytest.raises(DependencyError):
+        container.add(Config)
@@ -0,0 +1,293 @@
+# Copyright (c) 2022-present, Ethan Henderson
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import contextlib
+import functools
+
+import pytest
+
+import xsync
+from xsync import errors
+
+
+class MockPool:
+    def __init__(self):
+        self.free = ["conn"]
+        self.opened = 0
+
+    def acquire(self):
+        if not self.free:
+            self.opened += 1
+            return f"conn{self.opened}"
+        return self.free.pop()
+
+    def release(self, conn):
+        self.free.append(conn)
+
+
+pool = MockPool()
+
+
+@xsync.as_hybrid()
+@contextlib.contextmanager
+def connect(mode):
+    conn = pool.acquire()
+    try:
+        yield (conn, mode, "sync")
+    finally:
+        pool.release(conn)
+
+
+@xsync.set_async_impl(connect)
+@contextlib.asynccontextmanager
+async def async_connect(mode):
+    conn = pool.acquire()
+    try:
+        yield (conn, mode, "async")
+    finally:
+        pool.release(conn)
+
+
+class Transaction:
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        return f"{self.name} (sync)"
+
+    def __exit__(self, *exc):
+        return None
+
+
+@xsync.as_hybrid()
+class HybridTransaction(Transaction):
+    pass
+
+
+@xsync.set_async_impl(HybridTransaction)
+class AsyncTransaction:
+    def __init__(self, name):
+        self.name = name
+
+    async def __aenter__(self):
+        return f"{self.name} (async)"
+
+    async def __aexit__(self, *exc):
+        return None
+
+
+@xsync.as_hybrid()
+@contextlib.contextmanager
+def no_async_cm():
+    yield "sync"
+
+
+@xsync.as_hybrid(limit=1)
+@contextlib.contextmanager
+def limited_cm():
+    yield "sync"
+
+
+@xsync.set_async_impl(limited_cm)
+@contextlib.asynccontextmanager
+async def async_limited_cm():
+    yield "async"
+
+
+def test_sync_context_manager():
+    with connect("r") as c:
+        assert c == ("conn", "r", "sync")
+    assert pool.free == ["conn"]
+
+
+async def test_async_context_manager():
+    async with connect("w") as c:
+        assert c == ("conn", "w", "async")
+    assert pool.free == ["conn"]
+
+
+async def test_shared_pool():
+    with connect("r") as c1:
+        async with connect("w") as c2:
+            assert c1[0] != c2[0]
+
+    with connect("r") as c:
+        assert c[0] in ("conn", "conn1")
+    assert pool.opened == 1
+
+
+def test_sync_context_class():
+    with HybridTransaction("tx") as tx:
+        assert tx == "tx (sync)"
+
+
+async def test_async_context_class():
+    async with HybridTransaction("tx") as tx:
+        assert tx == "tx (async)"
+
+
+class Pool:
+    def __init__(self):
+        self.free = []
+        self.opened = 0
+
+    def acquire(self):
+        if self.free:
+            return self.free.pop()
+        self.opened += 1
+        return self.opened
+
+    def release(self, conn):
+        self.free.append(conn)
+
+
+class Connection:
+    pool = Pool()
+
+    def __init__(self, mode):
+        self.mode = mode
+
+    def __enter__(self):
+        self.conn = self.pool.acquire()
+        return self.conn, self.mode, "sync"
+
+    def __exit__(self, *exc):
+        self.pool.release(self.conn)
+
+
+@xsync.as_hybrid()
+class HybridConnection(Connection):
+    pass
+
+
+@xsync.set_async_impl(HybridConnection)
+class AsyncConnection:
+    def __init__(self, mode):
+        self.mode = mode
+
+    async def __aenter__(self):
+        self.conn = HybridConnection.pool.acquire()
+        return self.conn, self.mode, "async"
+
+    async def __aexit__(self, *exc):
+        HybridConnection.pool.release(self.conn)
+
+
+def test_context_class_is_class():
+    conn = HybridConnection("r")
+    assert isinstance(conn, HybridConnection)
+    assert isinstance(conn, Connection)
+    assert HybridConnection.__name__ == "HybridConnection"
+    assert HybridConnection.pool is Connection.pool
+
+    class ReadConnection(HybridConnection):
+        def __init__(self):
+            super().__init__("r")
+
+    with ReadConnection() as c:
+        assert c[1:] == ("r", "sync")
+
+
+async def test_context_class_shares_pool():
+    pool = HybridConnection.pool
+
+    for _ in range(3):
+        with HybridConnection("r") as c:
+            assert c == (1, "r", "sync")
+
+    async with HybridConnection("w") as c:
+        assert c == (1, "w", "async")
+
+    with HybridConnection("r") as c1:
+        async with HybridConnection("w") as c2:
+            assert c1[0] != c2[0]
+
+    assert pool.opened == 2
+
+
+def test_exception_propagates():
+    with pytest.raises(ValueError):
+        with connect("r"):
+            raise ValueError
+    assert "conn" in pool.free
+
+
+async def test_no_async_context_manager():
+    with no_async_cm() as v:
+        assert v == "sync"
+
+    with pytest.raises(errors.NoAsyncImplementation):
+        async with no_async_cm():
+            ...
+
+
+def test_wrapped_generator_is_not_context_manager():
+    def passthrough(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return func(*args, **kwargs)
+
+        return wrapper
+
+    @xsync.as_hybrid()
+    @passthrough
+    def numbers():
+        yield from range(3)
+
+    assert list(numbers()) == [0, 1, 2]
+
+
+def test_limited_context_manager():
+    limiter = xsync.get_stats(limited_cm).limiter
+
+    with limited_cm():
+        assert limiter.in_use == 1
+    assert limiter.in_use == 0
+
+    with pytest.raises(ValueError):
+        with limited_cm():
+            raise ValueError
+    assert limiter.in_use == 0
+
+
+async def test_async_limited_context_manager():
+    limiter = xsync.get_stats(limited_cm).limiter
+
+    async with limited_cm() as v:
+        assert v == "async"
+        assert limiter.in_use == 1
+    assert limiter.in_use == 0
+
+
+def test_context_manager_unsupported_option():
+    with pytest.raises(ValueError):
+
+        @xsync.as_hybrid(timeout=1)
+        @contextlib.contextmanager
+        def timed():
+            yield
@@ -0,0 +1,91 @@
+# Copyright (c) 2022-present, Ethan Henderson
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import logging
+import time
+
+import pytest
+
+import xsync
+from xsync import diagnostics
+
+
+@xsync.as_hybrid()
+def block(seconds):
+    time.sleep(seconds)
+    return "sync"
+
+
+@xsync.set_async_impl(block)
+async def async_block(seconds):
+    return "async"
+
+
+@pytest.fixture(autouse=True)
+def detection():
+    xsync.enable_blocking_detection(threshold=0.02, log_interval=60)
+    diagnostics.reset_blocking_report()
+    yield
+    xsync.disable_blocking_detection()
+
+
+def test_outside_loop():
+    assert block(0.03) == "sync"
+    assert xsync.blocking_report() == []
+
+
+async def test_inside_loop(caplog):
+    with caplog.at_level(logging.WARNING, logger="xsync.diagnostics"):
+        for _ in range(3):
+            assert block(0.03) == "sync"
+
+    (site,) = xsync.blocking_report()
+    assert site.qualname == "block"
+    assert site.filename == __file__
+    assert site.count == 3
+    assert site.max >= 0.03
+    assert site.total >= 0.09
+
+    # Only logged once per interval.
+    assert len(caplog.records) == 1
+    assert "'block' blocked the event loop" in caplog.records[0].message
+
+    stats = xsync.get_stats(block)
+    assert stats.blocking_calls >= 3
+
+
+async def test_below_threshold():
+    assert block(0) == "sync"
+    assert await block(0.03) == "async"
+    assert xsync.blocking_report() == []
+
+
+async def test_disabled():
+    xsync.disable_blocking_detection()
+    assert block(0.03) == "sync"
+    assert xsync.blocking_report() == []
@@ -0,0 +1,170 @@
+# Copyright (c) 2022-present, Ethan Henderson
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import asyncio
+import sys
+import types
+
+import pytest
+
+import xsync
+from xsync import errors
+
+cache = {"hit": "cached"}
+
+
+@xsync.as_hybrid(eager=True)
+def get(key):
+    return cache.get(key, "sync")
+
+
+@xsync.set_async_impl(get)
+async def async_get(key):
+    if key in cache:
+        return cache[key]
+
+    await asyncio.sleep(0.01)
+    if key == "error":
+        raise ValueError(key)
+    return "async"
+
+
+@xsync.as_hybrid(eager=True)
+def fail(): ...
+
+
+@xsync.set_async_impl(fail)
+async def async_fail():
+    raise ValueError("eager")
+
+
+@xsync.as_hybrid(eager=True)
+def current(): ...
+
+
+@xsync.set_async_impl(current)
+async def async_current():
+    before = asyncio.current_task()
+    await asyncio.sleep(0)
+    return before, asyncio.current_task()
+
+
+@xsync.as_hybrid(eager=True)
+def timed(): ...
+
+
+@xsync.set_async_impl(timed)
+async def async_timed():
+    async with asyncio.timeout(0.01):
+        await asyncio.sleep(1)
+
+
+def test_sync():
+    assert get("hit") == "cached"
+    assert get("miss") == "sync"
+
+
+async def test_eager_hit():
+    assert await get("hit") == "cached"
+
+
+async def test_eager_miss():
+    assert await get("miss") == "async"
+
+
+async def test_eager_gather():
+    results = await asyncio.gather(get("hit"), get("miss"), get("hit"))
+    assert results == ["cached", "async", "cached"]
+
+
+async def test_eager_errors():
+    with pytest.raises(ValueError):
+        await fail()
+
+    with pytest.raises(ValueError):
+        await get("error")
+
+
+async def test_eager_cancel():
+    async def main():
+        await get("miss")
+
+    task = asyncio.ensure_future(main())
+    await asyncio.sleep(0)
+    task.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+
+async def test_eager_stays_in_task():
+    before, after = await current()
+    assert before is after is asyncio.current_task()
+
+    [(before, after)] = await asyncio.gather(current())
+    assert before is after is not asyncio.current_task()
+
+
+@pytest.mark.skipif(sys.version_info < (3, 11), reason="needs asyncio.timeout")
+async def test_eager_gather_task_timeout():
+    async def other():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    # The timeout should only cancel the hybrid, rather than the task
+    # gathering it (and so everything else being gathered).
+    timeout, done = await asyncio.gather(timed(), other(), return_exceptions=True)
+    assert isinstance(timeout, TimeoutError)
+    assert done == "done"
+
+
+def test_run_eager():
+    assert xsync.run_eager(async_get("hit")) == "cached"
+
+
+def test_run_eager_bare_yield():
+    async def main():
+        await asyncio.sleep(0)
+        return "done"
+
+    assert xsync.run_eager(main()) == "done"
+
+
+def test_run_eager_suspends():
+    with pytest.raises(errors.CoroutineSuspended):
+        xsync.run_eager(async_get("miss"))
+
+    @types.coroutine
+    def suspend():
+        yield "something"
+
+    async def main():
+        await suspend()
+
+    with pytest.raises(errors.CoroutineSuspended):
+        xsync.run_eager(main())
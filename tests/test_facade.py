@@ -0,0 +1,197 @@
+# Copyright (c) 2022-present, Ethan Henderson
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+import xsync
+from xsync.errors import DeadlineExceeded
+
+
+class AsyncClient(xsync.AsyncInitMixin):
+    """An async client."""
+
+    closed = 0
+
+    def __init__(self, name):
+        self.name = name
+        self.ready = False
+
+    async def __ainit__(self, name):
+        self.name = name
+        self.loop = asyncio.get_running_loop()
+        self.ready = True
+        self.produced = 0
+        self.finalised = False
+
+    async def fetch(self, value, *, double=False):
+        await asyncio.sleep(0)
+        assert asyncio.get_running_loop() is self.loop
+        return value * 2 if double else value
+
+    async def fail(self):
+        raise ValueError("nope")
+
+    async def slow(self):
+        await asyncio.sleep(1)
+
+    async def stream(self, n):
+        try:
+            for i in range(n):
+                self.produced += 1
+                yield i
+        finally:
+            self.finalised = True
+
+    async def broken_stream(self):
+        yield 1
+        raise ValueError("broken")
+
+    def describe(self):
+        return f"client {self.name}"
+
+    async def aclose(self):
+        AsyncClient.closed += 1
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+
+SyncClient = xsync.syncify(AsyncClient)
+
+
+def test_facade_class():
+    assert SyncClient.__name__ == "SyncClient"
+    assert SyncClient.__doc__ == "An async client."
+    assert SyncClient.__xsync_async__ is AsyncClient
+
+
+def test_create_on_background_loop():
+    client = SyncClient("a")
+    assert client.ready
+    assert client.name == "a"
+    assert client.loop.is_running()
+    assert threading.current_thread() is threading.main_thread()
+
+
+def test_call_methods():
+    client = SyncClient("a")
+    assert client.fetch(1) == 1
+    assert client.fetch(2, double=True) == 4
+    assert client.describe() == "client a"
+
+    with pytest.raises(ValueError, match="nope"):
+        client.fail()
+
+
+def test_instances_are_pinned_to_loops():
+    Spread = xsync.syncify(AsyncClient, loops=2)
+    clients = [Spread(str(i)) for i in range(4)]
+
+    assert clients[0].loop is clients[2].loop
+    assert clients[1].loop is clients[3].loop
+    assert clients[0].loop is not clients[1].loop
+
+    for client in clients:
+        assert client.fetch(3) == 3
+
+
+def test_async_generators_become_iterators():
+    client = SyncClient("a")
+    assert list(client.stream(5)) == [0, 1, 2, 3, 4]
+
+
+def test_iterator_prefetch_is_bounded():
+    Limited = xsync.syncify(AsyncClient, prefetch=2)
+    client = Limited("a")
+    it = client.stream(100)
+    assert next(it) == 0
+
+    time.sleep(0.05)
+    assert client.produced <= 3
+
+    it.close()
+    for _ in range(100):
+        if client.finalised:
+            break
+        time.sleep(0.01)
+    assert client.finalised
+
+
+def test_iterator_errors():
+    client = SyncClient("a")
+    it = client.broken_stream()
+    assert next(it) == 1
+
+    with pytest.raises(ValueError, match="broken"):
+        next(it)
+
+
+def test_context_manager_and_close():
+    closed = AsyncClient.closed
+
+    with SyncClient("a") as client:
+        assert isinstance(client, SyncClient)
+        assert client.fetch(1) == 1
+
+    assert AsyncClient.closed == closed + 1
+    client.close()
+    assert AsyncClient.closed == closed + 2
+
+
+def test_deadline():
+    client = SyncClient("a")
+
+    with xsync.deadline(0.05):
+        with pytest.raises(DeadlineExceeded):
+            client.slow()
+
+
+def test_use_from_background_loop_is_refused():
+    client = SyncClient("a")
+
+    async def inner():
+        return client.fetch(1)
+
+    fut = asyncio.run_coroutine_threadsafe(inner(), client.loop)
+    with pytest.raises(RuntimeError, match="own background loop"):
+        fut.result()
+
+
+def test_invalid_options():
+    with pytest.raises(ValueError):
+        xsync.syncify(AsyncClient, loops=0)
+
+    with pytest.raises(ValueError):
+        xsync.syncify(AsyncClient, prefetch=0)
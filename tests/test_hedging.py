@@ -0,0 +1,144 @@
+# Copyright (c) 2022-present, Ethan Henderson
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import asyncio
+
+import pytest
+
+import xsync
+from xsync import errors
+
+
+class MockBackend:
+    def __init__(self, *delays):
+        self.delays = list(delays)
+        self.calls = 0
+        self.cancelled = 0
+
+    async def request(self, value):
+        delay = self.delays[min(self.calls, len(self.delays) - 1)]
+        self.calls += 1
+
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+
+        if value == "error":
+            raise ValueError(value)
+        return delay
+
+
+def make_hybrid(backend, **kwargs):
+    @xsync.as_hybrid(**kwargs)
+    def request(value):
+        return "sync"
+
+    @xsync.set_async_impl(request)
+    async def async_request(value):
+        return await backend.request(value)
+
+    return request
+
+
+def test_sync_not_hedged():
+    request = make_hybrid(MockBackend(1), hedge_after=0)
+    assert request("x") == "sync"
+    assert xsync.get_stats(request).hedged_calls == 0
+
+
+async def test_fast_call_not_hedged():
+    backend = MockBackend(0)
+    request = make_hybrid(backend, hedge_after=0.1)
+
+    assert await request("x") == 0
+    stats = xsync.get_stats(request)
+    assert backend.calls == 1
+    assert (stats.hedged_calls, stats.hedges, stats.hedge_rate) == (1, 0, 0)
+
+
+async def test_hedge_wins():
+    backend = MockBackend(1, 0)
+    request = make_hybrid(backend, hedge_after=0.01)
+
+    assert await request("x") == 0
+    await asyncio.sleep(0)
+    stats = xsync.get_stats(request)
+    assert backend.calls == 2
+    assert backend.cancelled == 1
+    assert (stats.hedges, stats.hedge_wins) == (1, 1)
+    assert stats.hedge_rate == stats.hedge_win_rate == 1
+
+
+async def test_max_hedges():
+    backend = MockBackend(0.1)
+    request = make_hybrid(backend, hedge_after=0.01, max_hedges=3)
+
+    assert await request("x") == 0.1
+    assert backend.calls == 4
+    assert xsync.get_stats(request).hedges == 3
+
+
+async def test_hedge_errors():
+    backend = MockBackend(0)
+    request = make_hybrid(backend, hedge_after=0.01)
+
+    with pytest.raises(ValueError):
+        await request("error")
+    assert backend.calls == 1
+
+
+async def test_adaptive_delay():
+    backend = MockBackend(*[0] * 20, 1, 0)
+    request = make_hybrid(backend, hedge_after="p90")
+
+    for _ in range(20):
+        await request("x")
+    assert xsync.get_stats(request).hedges == 0
+
+    assert await request("x") == 0
+    stats = xsync.get_stats(request)
+    assert stats.hedges == 1
+    assert stats.percentile(50) < 1
+
+
+def test_invalid_options():
+    with pytest.raises(ValueError):
+        make_hybrid(MockBackend(0), hedge_after="95")
+
+    with pytest.raises(ValueError):
+        make_hybrid(MockBackend(0), hedge_after="p100")
+
+    with pytest.raises(ValueError):
+        make_hybrid(MockBackend(0), hedge_after=0.1, max_hedges=0)
+
+
+def test_stats_of_non_hybrid():
+    with pytest.raises(errors.NotHybridCallable):
+        xsync.get_stats(test_invalid_options)
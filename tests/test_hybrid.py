@@ -26,7 +26,10 @@
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+import asyncio
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import mock
 import pytest
@@ -182,3 +185,133 @@ def test_no_qualname():
             @xsync.set_async_impl(from_love)
             def async_from_love(cls):
                 return cls()
+
+
+@xsync.hybrid_class()
+class MockClient:
+    def get(self, text):
+        return text
+
+    async def async_get(self, text):
+        return text[::-1]
+
+    @classmethod
+    def create(cls):
+        return "sync"
+
+    @classmethod
+    async def async_create(cls):
+        return "async"
+
+    @staticmethod
+    def helper(text):
+        return text
+
+    @staticmethod
+    async def async_helper(text):
+        return text[::-1]
+
+    @xsync.as_hybrid()
+    def wrapped(self, text):
+        return text
+
+    async def async_wrapped(self, text):
+        return text[::-1]
+
+    def sync_only(self):
+        return "sync"
+
+
+@xsync.hybrid_class(prefix="", suffix="_async")
+class MockSuffixClient:
+    def get(self):
+        return "sync"
+
+    async def get_async(self):
+        return "async"
+
+
+def test_hybrid_class_sync():
+    c = MockClient()
+    assert c.get("xsync") == "xsync"
+    assert MockClient.create() == "sync"
+    assert c.helper("xsync") == "xsync"
+    assert c.wrapped("xsync") == "xsync"
+    assert c.sync_only() == "sync"
+    assert MockSuffixClient().get() == "sync"
+
+
+async def test_hybrid_class_async():
+    c = MockClient()
+    assert await c.get("xsync") == "cnysx"
+    assert await c.async_get("xsync") == "cnysx"
+    assert await MockClient.create() == "async"
+    assert await MockClient.helper("xsync") == "cnysx"
+    assert await c.wrapped("xsync") == "cnysx"
+    assert await MockSuffixClient().get() == "async"
+
+
+def test_hybrid_class_unpaired_async():
+    with pytest.raises(errors.NoSyncImplementation) as exc:
+
+        @xsync.hybrid_class()
+        class Unpaired:
+            async def async_get(self): ...
+
+    assert str(exc.value) == (
+        "'test_hybrid_class_unpaired_async.<locals>.Unpaired.async_get' "
+        "does not have a sync counterpart named 'get'"
+    )
+
+
+def test_hybrid_class_unpaired_hybrid():
+    with pytest.raises(errors.NoAsyncImplementation):
+
+        @xsync.hybrid_class()
+        class Unpaired:
+            @xsync.as_hybrid()
+            def get(self): ...
+
+
+def test_hybrid_class_keeps_options():
+    @xsync.hybrid_class()
+    class Limited:
+        @xsync.as_hybrid(limit=2, timeout=0.01)
+        def get(self):
+            time.sleep(0.1)
+
+        async def async_get(self): ...
+
+    assert xsync.get_stats(Limited.get).limiter.limit == 2
+    with pytest.raises(errors.DeadlineExceeded):
+        Limited().get()
+
+
+def test_hybrid_class_no_naming_rule():
+    with pytest.raises(ValueError):
+        xsync.hybrid_class(prefix="")
+
+
+def test_concurrent_registration_and_calls():
+    def work(n):
+        @xsync.as_hybrid()
+        def local(text):
+            return text
+
+        @xsync.set_async_impl(local)
+        async def async_local(text):
+            return n, text[::-1]
+
+        async def main():
+            return await local(f"{n}x")
+
+        results = [func("xsync") for _ in range(50)]
+        return results, local("x"), asyncio.run(main())
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(work, range(32)))
+
+    for n, (calls, sync, async_) in enumerate(results):
+        assert calls == ["xsync"] * 50
+        assert sync == "x"
+        assert async_ == (n, f"{n}x"[::-1])
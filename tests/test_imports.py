@@ -0,0 +1,82 @@
+# Copyright (c) 2022-present, Ethan Henderson
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import platform
+import subprocess
+import sys
+
+import pytest
+
+# Generous enough for slow CI runners, but well below the cost of
+# pulling in asyncio, inspect, or logging.
+IMPORT_BUDGET_US = 15_000
+HEAVY_MODULES = ("asyncio", "inspect", "logging")
+
+
+def run(code, *options):
+    return subprocess.run(
+        [sys.executable, *options, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+@pytest.mark.skipif(
+    platform.python_implementation() != "CPython",
+    reason="-X importtime is only supported by CPython",
+)
+def test_import_time_budget():
+    times = []
+
+    for _ in range(3):
+        for line in run("import xsync", "-X", "importtime").stderr.splitlines():
+            *_, cumulative, name = line.split("|")
+            if name.strip() == "xsync":
+                times.append(int(cumulative))
+
+    assert min(times) < IMPORT_BUDGET_US
+
+
+def test_no_heavy_imports():
+    code = (
+        "import sys, xsync\n"
+        "xsync.as_hybrid, xsync.maybe_async, xsync.AsyncInitMixin\n"
+        "xsync.hybrid_cached_property, xsync.hybrid_class\n"
+        f"print(*(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    assert run(code).stdout.strip() == ""
+
+
+def test_lazy_attributes():
+    import xsync
+
+    assert "as_hybrid" in dir(xsync)
+
+    with pytest.raises(AttributeError):
+        xsync.not_a_thing
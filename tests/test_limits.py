@@ -0,0 +1,219 @@
+# Copyright (c) 2022-present, Ethan Henderson
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import xsync
+
+
+class MockBackend:
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def enter(self):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+
+    def exit(self):
+        with self.lock:
+            self.active -= 1
+
+
+backend = MockBackend()
+
+
+@xsync.as_hybrid(limit=3)
+def request(seconds):
+    backend.enter()
+    time.sleep(seconds)
+    backend.exit()
+    return "sync"
+
+
+@xsync.set_async_impl(request)
+async def async_request(seconds):
+    backend.enter()
+    await asyncio.sleep(seconds)
+    backend.exit()
+    return "async"
+
+
+def test_invalid_limits():
+    with pytest.raises(ValueError):
+        xsync.Limiter(0)
+
+    with pytest.raises(ValueError):
+        xsync.Limiter(rate=0)
+
+    with pytest.raises(ValueError):
+        xsync.as_hybrid(limit=xsync.Limiter(2), rate=1)(lambda: None)
+
+
+async def test_shared_limit():
+    backend.peak = 0
+
+    def sync_callers():
+        with ThreadPoolExecutor(6) as pool:
+            return list(pool.map(request, [0.01] * 12))
+
+    sync = asyncio.get_running_loop().run_in_executor(None, sync_callers)
+    results = await asyncio.gather(*(request(0.01) for _ in range(12)))
+
+    assert await sync == ["sync"] * 12
+    assert results == ["async"] * 12
+    assert backend.peak == 3
+
+    stats = xsync.get_stats(request).as_dict()["limiter"]
+    assert stats["in_use"] == stats["waiting"] == 0
+    assert stats["acquisitions"] == 24
+    assert stats["waits"] > 0
+    assert stats["max_wait"] >= stats["mean_wait"] > 0
+
+
+async def test_fifo():
+    limiter = xsync.Limiter(1)
+    order = []
+
+    async def worker(i):
+        async with limiter:
+            order.append(i)
+            await asyncio.sleep(0)
+
+    await limiter.acquire_async()
+    tasks = [asyncio.ensure_future(worker(i)) for i in range(5)]
+    await asyncio.sleep(0)
+
+    # A caller turning up later doesn't jump the queue.
+    assert not limiter.acquire(timeout=0)
+    limiter.release()
+    await asyncio.gather(*tasks)
+    assert order == list(range(5))
+
+
+def test_rate():
+    limiter = xsync.Limiter(rate=20, burst=1)
+    start = time.monotonic()
+
+    for _ in range(5):
+        with limiter:
+            ...
+
+    assert time.monotonic() - start >= 0.19
+
+
+async def test_async_rate():
+    limiter = xsync.Limiter(rate=20, burst=2)
+    start = time.monotonic()
+
+    for _ in range(6):
+        async with limiter:
+            ...
+
+    assert time.monotonic() - start >= 0.19
+
+
+def test_concurrent_rate():
+    limiter = xsync.Limiter(rate=20, burst=2)
+
+    def job():
+        with limiter:
+            ...
+
+    with ThreadPoolExecutor(12) as pool:
+        for future in [pool.submit(job) for _ in range(12)]:
+            future.result(timeout=5)
+
+    assert limiter.waiting == 0
+    assert limiter.waits == 10
+
+
+async def test_async_concurrent_rate():
+    limiter = xsync.Limiter(rate=20, burst=2)
+
+    async def job():
+        async with limiter:
+            ...
+
+    tasks = [asyncio.create_task(job()) for _ in range(12)]
+    await asyncio.wait_for(asyncio.gather(*tasks), 5)
+
+    assert limiter.waiting == 0
+    assert limiter.waits == 10
+
+
+def test_acquire_timeout():
+    limiter = xsync.Limiter(1)
+    assert limiter.acquire()
+    assert not limiter.acquire(timeout=0.01)
+    assert limiter.waiting == 0
+    limiter.release()
+    assert limiter.acquire(timeout=0.01)
+
+
+async def test_async_acquire_timeout():
+    limiter = xsync.Limiter(1)
+    assert await limiter.acquire_async()
+    assert not await limiter.acquire_async(timeout=0.01)
+    assert limiter.waiting == 0
+
+
+async def test_cancelled_waiter():
+    limiter = xsync.Limiter(1)
+    await limiter.acquire_async()
+
+    task = asyncio.ensure_future(limiter.acquire_async())
+    await asyncio.sleep(0)
+    assert limiter.waiting == 1
+
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert limiter.waiting == 0
+    limiter.release()
+    assert limiter.in_use == 0
+
+
+async def test_thread_wakes_task():
+    limiter = xsync.Limiter(1)
+    limiter.acquire()
+
+    task = asyncio.ensure_future(limiter.acquire_async())
+    await asyncio.sleep(0)
+    threading.Thread(target=limiter.release).start()
+
+    assert await asyncio.wait_for(task, 1)
+    assert limiter.in_use == 1
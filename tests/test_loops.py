@@ -0,0 +1,198 @@
+# Copyright (c) 2022-present, Ethan Henderson
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import asyncio
+import gc
+import threading
+
+import pytest
+
+import xsync
+
+
+class MockSession:
+    created = 0
+
+    def __init__(self):
+        MockSession.created += 1
+        self.loop = asyncio.get_running_loop()
+        self.closed = False
+
+    async def aclose(self):
+        assert asyncio.get_running_loop() is self.loop
+        self.closed = True
+
+
+async def create_session():
+    await asyncio.sleep(0.01)
+    return MockSession()
+
+
+def test_one_resource_per_loop():
+    sessions = xsync.loop_local(MockSession)
+
+    async def main():
+        first = await sessions.get()
+        assert await sessions.get() is first
+        return first
+
+    s1 = asyncio.run(main())
+    s2 = asyncio.run(main())
+    assert s1 is not s2
+    assert s1.closed and s2.closed
+
+
+def test_async_factory_single_flight():
+    sessions = xsync.loop_local(create_session)
+    before = MockSession.created
+
+    async def main():
+        results = await asyncio.gather(*(sessions.get() for _ in range(10)))
+        assert len({id(r) for r in results}) == 1
+        return results[0]
+
+    session = asyncio.run(main())
+    assert MockSession.created == before + 1
+    assert session.closed
+
+
+def test_loops_in_threads():
+    sessions = xsync.loop_local(MockSession)
+    results = []
+
+    def work():
+        async def main():
+            s = await sessions.get()
+            assert s.loop is asyncio.get_running_loop()
+            return s
+
+        results.append(asyncio.run(main()))
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(r) for r in results}) == 4
+    assert all(r.closed for r in results)
+
+
+def test_custom_close():
+    closed = []
+    sessions = xsync.loop_local(dict, close=closed.append)
+
+    async def main():
+        return await sessions.get()
+
+    resource = asyncio.run(main())
+    assert closed == [resource]
+
+
+def test_explicit_close():
+    sessions = xsync.loop_local(MockSession)
+
+    async def main():
+        first = await sessions.get()
+        await sessions.aclose()
+        assert first.closed
+
+        second = await sessions.get()
+        assert second is not first
+        return second
+
+    assert asyncio.run(main()).closed
+
+
+def test_factory_error():
+    calls = []
+
+    def factory():
+        calls.append(None)
+        if len(calls) == 1:
+            raise ValueError
+        return MockSession()
+
+    sessions = xsync.loop_local(factory)
+
+    async def main():
+        with pytest.raises(ValueError):
+            await sessions.get()
+        return await sessions.get()
+
+    assert asyncio.run(main()).closed
+
+
+def test_first_caller_cancelled():
+    sessions = xsync.loop_local(create_session)
+
+    async def main():
+        first = asyncio.create_task(sessions.get())
+        await asyncio.sleep(0)
+        second = asyncio.create_task(sessions.get())
+        await asyncio.sleep(0)
+
+        first.cancel()
+        session = await second
+        assert first.cancelled()
+        assert await sessions.get() is session
+        return session
+
+    assert asyncio.run(main()).closed
+
+
+def test_discarded_loop():
+    closed = []
+    sessions = xsync.loop_local(dict, close=closed.append)
+
+    loop = asyncio.new_event_loop()
+    resource = loop.run_until_complete(sessions.get())
+    loop.close()
+    del loop
+    gc.collect()
+
+    assert len(sessions._resources) == 0
+    assert closed == [resource]
+
+
+def test_hybrid_reuses_resource():
+    sessions = xsync.loop_local(MockSession)
+
+    @xsync.as_hybrid()
+    def fetch():
+        return None
+
+    @xsync.set_async_impl(fetch)
+    async def async_fetch():
+        return await sessions.get()
+
+    async def main():
+        return await fetch(), await fetch()
+
+    first, second = asyncio.run(main())
+    assert first is second
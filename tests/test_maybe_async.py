@@ -26,7 +26,10 @@
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+import mock
+
 import xsync
+from xsync import deco
 
 # Functions
 
@@ -40,6 +43,15 @@ async def _async_func(text):
     return text[::-1]
 
 
+@xsync.maybe_async()
+def resolved(text):
+    return text
+
+
+async def _async_resolved(text):
+    return text[::-1]
+
+
 class MockObject:
     def __init__(self, sync=None):
         self.sync = sync
@@ -101,3 +113,39 @@ async def test_async_classmethod():
 
     t2 = await MockObject._async_from_love()
     assert not t2.sync
+
+
+def test_sync_static_method():
+    t = MockObject()
+    assert t.static_meth("xsync") == "xsync"
+    assert MockObject.static_meth("xsync") == "xsync"
+
+
+async def test_async_static_method():
+    t = MockObject()
+    assert await t.static_meth("xsync") == "cnysx"
+    assert await MockObject.static_meth("xsync") == "cnysx"
+
+
+async def test_rebound_companion():
+    async def replacement(self, text):
+        return text.upper()
+
+    original = MockObject._async_meth
+    MockObject._async_meth = replacement
+    try:
+        assert await MockObject().meth("xsync") == "XSYNC"
+    finally:
+        MockObject._async_meth = original
+
+    assert await MockObject().meth("xsync") == "cnysx"
+
+
+async def test_owner_resolved_once():
+    with mock.patch.object(
+        deco, "_resolve_owner", wraps=deco._resolve_owner
+    ) as resolve:
+        for _ in range(5):
+            assert await resolved("xsync") == "cnysx"
+
+    assert resolve.call_count == 1
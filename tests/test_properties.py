@@ -0,0 +1,151 @@
+# Copyright (c) 2022-present, Ethan Henderson
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import asyncio
+
+import pytest
+
+import xsync
+from xsync import errors
+
+
+class MockObject:
+    def __init__(self):
+        self.sync_calls = 0
+        self.async_calls = 0
+
+    @xsync.hybrid_cached_property
+    def value(self):
+        self.sync_calls += 1
+        return "sync"
+
+    @xsync.set_async_impl(value)
+    async def async_value(self):
+        self.async_calls += 1
+        await asyncio.sleep(0.01)
+        return "async"
+
+    @xsync.hybrid_cached_property
+    def no_async(self):
+        return "sync"
+
+
+class Slotted:
+    __slots__ = ()
+
+    @xsync.hybrid_cached_property
+    def value(self):
+        return "sync"
+
+
+def test_sync_access():
+    m = MockObject()
+    assert m.value == "sync"
+    assert m.value == "sync"
+    assert m.sync_calls == 1
+    assert m.__dict__["value"] == "sync"
+
+
+async def test_async_access():
+    m = MockObject()
+    assert await m.value == "async"
+    assert await m.value == "async"
+    assert m.async_calls == 1
+
+
+async def test_shared_between_modes():
+    m = MockObject()
+    assert await m.value == "async"
+    assert m.value == "async"
+
+    n = MockObject()
+    assert n.value == "sync"
+    assert await n.value == "sync"
+    assert n.async_calls == 0
+
+
+async def test_single_flight():
+    m = MockObject()
+
+    async def get():
+        return await m.value
+
+    results = await asyncio.gather(*(get() for _ in range(10)))
+    assert results == ["async"] * 10
+    assert m.async_calls == 1
+
+
+async def test_first_awaiter_cancelled():
+    m = MockObject()
+
+    async def get():
+        return await m.value
+
+    first = asyncio.create_task(get())
+    await asyncio.sleep(0)
+    second = asyncio.create_task(get())
+    await asyncio.sleep(0)
+
+    first.cancel()
+    assert await second == "async"
+    assert first.cancelled()
+    assert m.async_calls == 1
+
+
+async def test_invalidation():
+    m = MockObject()
+    assert m.value == "sync"
+    del m.value
+    assert await m.value == "async"
+    del m.value
+    del m.value
+    assert m.value == "sync"
+    assert m.sync_calls == 2
+
+
+def test_set():
+    m = MockObject()
+    m.value = "primed"
+    assert m.value == "primed"
+    assert m.sync_calls == 0
+
+
+async def test_no_async_implementation():
+    m = MockObject()
+
+    with pytest.raises(errors.NoAsyncImplementation):
+        await m.no_async
+
+
+def test_no_dict():
+    with pytest.raises(TypeError):
+        Slotted().value
+
+
+def test_class_access():
+    assert isinstance(MockObject.value, xsync.hybrid_cached_property)
@@ -0,0 +1,165 @@
+# Copyright (c) 2022-present, Ethan Henderson
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import asyncio
+import time
+
+import pytest
+
+import xsync
+from xsync import errors
+
+
+@xsync.as_hybrid(timeout=0.05)
+def sleep(seconds):
+    time.sleep(seconds)
+    return "sync"
+
+
+@xsync.set_async_impl(sleep)
+async def async_sleep(seconds):
+    await asyncio.sleep(seconds)
+    return "async"
+
+
+@xsync.as_hybrid(timeout=10)
+def budget():
+    return xsync.remaining()
+
+
+@xsync.set_async_impl(budget)
+async def async_budget():
+    return xsync.remaining()
+
+
+@xsync.as_hybrid()
+def outer():
+    return budget()
+
+
+@xsync.set_async_impl(outer)
+async def async_outer():
+    return await budget()
+
+
+def test_sync_within_timeout():
+    assert sleep(0) == "sync"
+
+
+def test_sync_timeout():
+    with pytest.raises(errors.DeadlineExceeded) as exc:
+        sleep(0.2)
+    assert str(exc.value) == "'sleep' did not complete within its deadline"
+
+
+async def test_async_within_timeout():
+    assert await sleep(0) == "async"
+
+
+async def test_async_timeout():
+    with pytest.raises(errors.DeadlineExceeded):
+        await sleep(0.2)
+
+    with pytest.raises(TimeoutError):
+        await sleep(0.2)
+
+
+def test_no_deadline():
+    assert xsync.remaining() is None
+    assert 9 < budget() <= 10
+
+
+def test_sync_deadline():
+    with xsync.deadline(0.2):
+        assert 0 < xsync.remaining() <= 0.2
+        assert budget() <= 0.2
+        assert outer() <= 0.2
+
+        with pytest.raises(errors.DeadlineExceeded):
+            sleep(0.2)
+
+    assert xsync.remaining() is None
+
+
+async def test_async_deadline():
+    async with xsync.deadline(0.2):
+        assert await budget() <= 0.2
+        assert await outer() <= 0.2
+
+    assert 9 < await budget() <= 10
+
+
+def test_nested_deadlines():
+    with xsync.deadline(0.2):
+        with xsync.deadline(10):
+            assert xsync.remaining() <= 0.2
+
+        with xsync.deadline(0.1):
+            assert xsync.remaining() <= 0.1
+
+
+async def test_shared_deadline():
+    shared = xsync.deadline(1)
+
+    async def worker(delay):
+        async with shared:
+            await asyncio.sleep(delay)
+            return xsync.remaining()
+
+    # The first worker exits while the second is still inside.
+    first, second = await asyncio.gather(worker(0.01), worker(0.05))
+    assert 0 < second < first <= 1
+    assert xsync.remaining() is None
+
+
+async def test_expired_deadline():
+    async with xsync.deadline(0):
+        with pytest.raises(errors.DeadlineExceeded):
+            await sleep(0)
+
+        with pytest.raises(errors.DeadlineExceeded):
+            sleep(0)
+
+
+async def test_async_timeout_cancels():
+    cancelled = asyncio.Event()
+
+    @xsync.as_hybrid(timeout=0.01)
+    def hang(): ...
+
+    @xsync.set_async_impl(hang)
+    async def async_hang():
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with pytest.raises(errors.DeadlineExceeded):
+        await hang()
+    assert cancelled.is_set()
@@ -26,7 +26,28 @@
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
-__all__ = ("AsyncInitMixin", "as_hybrid", "maybe_async", "set_async_impl")
+__all__ = (
+    "AsyncInitMixin",
+    "CircuitBreaker",
+    "Container",
+    "Limiter",
+    "as_hybrid",
+    "blocking_report",
+    "deadline",
+    "disable_blocking_detection",
+    "enable_blocking_detection",
+    "get_stats",
+    "hybrid_cached_property",
+    "hybrid_class",
+    "load_dispatch_index",
+    "loop_local",
+    "maybe_async",
+    "remaining",
+    "run_eager",
+    "set_async_impl",
+    "syncify",
+    "to_thread",
+)
 
 __productname__ = "xsync"
 __version__ = "0.2.1"
@@ -39,6 +60,66 @@ __bugtracker__ = "https://github.com/parafoxia/Xsync/issues"
 __ci__ = "https://github.com/parafoxia/Xsync/actions"
 __changelog__ = "https://github.com/parafoxia/Xsync/releases"
 
-from .asyncinit import AsyncInitMixin
-from .deco import maybe_async
-from .hybrid import as_hybrid, set_async_impl
+import typing as _t
+
+if _t.TYPE_CHECKING:
+    from .analyse import load_dispatch_index
+    from .asyncinit import AsyncInitMixin
+    from .backends import to_thread
+    from .breakers import CircuitBreaker
+    from .container import Container
+    from .deco import maybe_async
+    from .diagnostics import (
+        blocking_report,
+        disable_blocking_detection,
+        enable_blocking_detection,
+    )
+    from .eager import run_eager
+    from .facade import syncify
+    from .hybrid import as_hybrid, hybrid_class, set_async_impl
+    from .limits import Limiter
+    from .loops import loop_local
+    from .properties import hybrid_cached_property
+    from .stats import get_stats
+    from .timeouts import deadline, remaining
+
+# Submodules are only imported once something from them is used.
+_lazy = {
+    "AsyncInitMixin": "asyncinit",
+    "CircuitBreaker": "breakers",
+    "Container": "container",
+    "Limiter": "limits",
+    "as_hybrid": "hybrid",
+    "blocking_report": "diagnostics",
+    "deadline": "timeouts",
+    "disable_blocking_detection": "diagnostics",
+    "enable_blocking_detection": "diagnostics",
+    "get_stats": "stats",
+    "hybrid_cached_property": "properties",
+    "hybrid_class": "hybrid",
+    "load_dispatch_index": "analyse",
+    "loop_local": "loops",
+    "maybe_async": "deco",
+    "remaining": "timeouts",
+    "run_eager": "eager",
+    "set_async_impl": "hybrid",
+    "syncify": "facade",
+    "to_thread": "backends",
+}
+
+
+def __getattr__(name: str) -> _t.Any:
+    try:
+        module = _lazy[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+
+    from importlib import import_module
+
+    value = getattr(import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *_lazy})
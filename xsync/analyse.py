@@ -0,0 +1,581 @@
+# Copyright (c) 2022-present, Ethan Henderson
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""Find calls to hybrid callables ahead of time.
+
+Run with `python -m xsync.analyse <package>`, where `<package>` is a
+directory or the name of an importable package. Every call to a hybrid
+is classified as awaited or not using the syntax tree, which gets right
+the cases that checking the calling line for "await" gets wrong, such
+as awaits split over several lines, or coroutines passed straight to
+`asyncio.gather` or `asyncio.create_task`. Hybrids without an async
+implementation are reported too.
+
+The results are written to an index which can be loaded at startup with
+`xsync.load_dispatch_index`, so call sites in it don't need to be
+checked at runtime.
+
+Hybrids are matched by name only, so a call to anything sharing a name
+with a hybrid is included as well. This is harmless, as the index is
+only used for calls which are made to hybrids.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import typing as t
+from pathlib import Path
+
+from xsync import utils
+from xsync.utils import get_logger
+
+if t.TYPE_CHECKING:
+    import ast
+
+_log = get_logger(__name__)
+
+INDEX_VERSION = 1
+
+# Calls which await or schedule the coroutines passed to them.
+_AWAITING = frozenset(
+    (
+        "as_completed",
+        "create_task",
+        "ensure_future",
+        "gather",
+        "run_coroutine_threadsafe",
+        "run_until_complete",
+        "shield",
+        "wait",
+        "wait_for",
+    )
+)
+
+
+_CONTEXT_MANAGERS = frozenset(("asynccontextmanager", "contextmanager"))
+
+
+class CallSite(t.NamedTuple):
+    """A call to a hybrid callable, and whether it is awaited
+    (`awaited`) and whether runtime detection thinks it is (`detected`).
+    """
+
+    file: str
+    qualname: str
+    line: int
+    callee: str
+    awaited: bool
+    detected: bool
+
+
+class MissingImpl(t.NamedTuple):
+    """A hybrid callable without an async implementation."""
+
+    file: str
+    line: int
+    name: str
+
+
+class Analysis(t.NamedTuple):
+    """The results of analysing a package."""
+
+    package: str
+    files: int
+    sites: list[CallSite]
+    missing: list[MissingImpl]
+
+    @property
+    def misdetected(self) -> list[CallSite]:
+        return [s for s in self.sites if s.awaited != s.detected]
+
+    def as_index(self) -> dict[str, t.Any]:
+        # Calls on the same line which aren't all awaited, or all not
+        # awaited, can't be told apart, so they're left out.
+        results: dict[tuple[str, str, int], set[bool]] = {}
+        for site in self.sites:
+            results.setdefault(site[:3], set()).add(site.awaited)
+
+        return {
+            "version": INDEX_VERSION,
+            "python": _python(),
+            "package": self.package,
+            "sites": [
+                [*key, found.pop()]
+                for key, found in sorted(results.items())
+                if len(found) == 1
+            ],
+        }
+
+
+def _python() -> str:
+    return f"{sys.version_info[0]}.{sys.version_info[1]}"
+
+
+def _name(node: ast.AST) -> str | None:
+    import ast
+
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    return None
+
+
+def _decorators(
+    node: ast.ClassDef | ast.FunctionDef | ast.AsyncFunctionDef,
+) -> t.Iterator[tuple[str | None, ast.Call | None]]:
+    import ast
+
+    for deco in node.decorator_list:
+        if isinstance(deco, ast.Call):
+            yield _name(deco.func), deco
+        else:
+            yield _name(deco), None
+
+
+class _Collector:
+    # Finds every hybrid definition in a package, so calls to them can
+    # be found in a second pass.
+    def __init__(self) -> None:
+        self.hybrids: set[str] = set()
+        self.missing: list[MissingImpl] = []
+        self._classes: list[tuple[str, set[str | None]]] = []
+        self._decorated: list[tuple[str, int, str, int]] = []
+        self._impls: set[tuple[int, str]] = set()
+        self._impl_attrs: set[str] = set()
+
+    def collect(self, file: str, tree: ast.Module) -> None:
+        import ast
+
+        for scope in ast.walk(tree):
+            if not isinstance(
+                scope, (ast.Module, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)
+            ):
+                continue
+
+            funcs = [
+                n
+                for n in scope.body
+                if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))
+            ]
+            names = {f.name for f in funcs}
+
+            for func in funcs:
+                self._collect_function(file, id(scope), names, func)
+
+            for node in scope.body:
+                if isinstance(node, ast.ClassDef):
+                    self._collect_class(node)
+
+    def _collect_function(
+        self,
+        file: str,
+        scope: int,
+        names: set[str],
+        node: ast.FunctionDef | ast.AsyncFunctionDef,
+    ) -> None:
+        import ast
+
+        decorators = list(_decorators(node))
+        # Hybrid context managers are chosen when they're entered rather
+        # than when they're called, so calls to them aren't checked.
+        context = any(name in _CONTEXT_MANAGERS for name, _ in decorators)
+
+        for name, call in decorators:
+            if name == "as_hybrid":
+                if not context:
+                    self.hybrids.add(node.name)
+                self._decorated.append((file, node.lineno, node.name, scope))
+
+            elif name == "maybe_async":
+                self.hybrids.add(node.name)
+                if f"_async_{node.name}" not in names:
+                    self.missing.append(MissingImpl(file, node.lineno, node.name))
+
+            elif name == "set_async_impl" and call is not None and call.args:
+                target = call.args[0]
+                if isinstance(target, ast.Name):
+                    self._impls.add((scope, target.id))
+                elif isinstance(target, ast.Attribute):
+                    self._impl_attrs.add(target.attr)
+
+    def _collect_class(self, node: ast.ClassDef) -> None:
+        import ast
+
+        self._classes.append((node.name, {_name(b) for b in node.bases}))
+
+        for name, call in _decorators(node):
+            if name != "hybrid_class":
+                continue
+
+            affixes = {"prefix": "async_", "suffix": ""}
+            given: list[tuple[str | None, ast.expr]] = []
+            if call is not None:
+                given.extend(zip(affixes, call.args))
+                given.extend((k.arg, k.value) for k in call.keywords)
+
+            for arg, value in given:
+                # Before Python 3.8, strings are `ast.Str` rather than
+                # `ast.Constant` nodes.
+                try:
+                    literal = ast.literal_eval(value)
+                except ValueError:
+                    continue
+                if arg in affixes and isinstance(literal, str):
+                    affixes[arg] = literal
+
+            prefix, suffix = affixes["prefix"], affixes["suffix"]
+            methods = {n.name for n in node.body if isinstance(n, ast.FunctionDef)}
+
+            for method in node.body:
+                if (
+                    isinstance(method, ast.AsyncFunctionDef)
+                    and method.name.startswith(prefix)
+                    and method.name.endswith(suffix)
+                ):
+                    base = method.name[len(prefix) : len(method.name) - len(suffix)]
+                    if base in methods:
+                        self.hybrids.add(base)
+                        # Pairing counts as an async implementation for
+                        # methods also decorated with `as_hybrid`.
+                        self._impls.add((id(node), base))
+
+    def finish(self) -> None:
+        # Classes using `AsyncInitMixin` can also be awaited, as can
+        # their subclasses.
+        bases: set[str | None] = {"AsyncInitMixin"}
+        grew = True
+        while grew:
+            grew = False
+            for name, parents in self._classes:
+                if name not in bases and bases & parents:
+                    bases.add(name)
+                    grew = True
+
+        self.hybrids |= {b for b in bases if b and b != "AsyncInitMixin"}
+
+        for file, line, name, scope in self._decorated:
+            if (scope, name) not in self._impls and name not in self._impl_attrs:
+                self.missing.append(MissingImpl(file, line, name))
+
+
+def _is_awaited(node: ast.Call, parents: dict[ast.AST, ast.AST]) -> bool:
+    import ast
+
+    parent = parents.get(node)
+    if isinstance(parent, ast.Await):
+        return True
+    if isinstance(parent, ast.withitem):
+        return isinstance(parents.get(parent), ast.AsyncWith)
+    if isinstance(parent, ast.AsyncFor):
+        return parent.iter is node
+
+    # Coroutines passed to something which awaits or schedules them,
+    # including from within a list or generator expression.
+    child: ast.AST = node
+    while isinstance(
+        parent,
+        (ast.Starred, ast.List, ast.Tuple, ast.Set, ast.GeneratorExp, ast.ListComp),
+    ):
+        if isinstance(parent, (ast.GeneratorExp, ast.ListComp)):
+            if parent.elt is not child:
+                return False
+        child, parent = parent, parents.get(parent)
+
+    if not isinstance(parent, ast.Call) or child is parent.func:
+        return False
+
+    name = _name(parent.func)
+    if name == "run" and isinstance(parent.func, ast.Attribute):
+        return _name(parent.func.value) == "asyncio"
+    return name in _AWAITING
+
+
+class _Visitor:
+    # Finds calls to hybrids, keeping track of the name of the code
+    # object each call is made from, as the runtime sees it.
+    def __init__(
+        self, file: str, lines: list[str], tree: ast.Module, hybrids: set[str]
+    ) -> None:
+        import ast
+
+        self.file = file
+        self.lines = lines
+        self.hybrids = hybrids
+        self.sites: list[CallSite] = []
+        self.parents = {
+            child: parent
+            for parent in ast.walk(tree)
+            for child in ast.iter_child_nodes(parent)
+        }
+        self._scope: list[tuple[str, bool]] = []
+
+    @property
+    def qualname(self) -> str:
+        if not self._scope:
+            return "<module>"
+
+        parts = []
+        for i, (name, _) in enumerate(self._scope):
+            if i and self._scope[i - 1][1]:
+                parts.append("<locals>")
+            parts.append(name)
+        return ".".join(parts)
+
+    def visit(self, node: ast.AST) -> None:
+        getattr(self, f"visit_{type(node).__name__}", self.generic_visit)(node)
+
+    def generic_visit(self, node: ast.AST) -> None:
+        import ast
+
+        for child in ast.iter_child_nodes(node):
+            self.visit(child)
+
+    def _enter(self, name: str, function: bool, body: list[t.Any]) -> None:
+        self._scope.append((name, function))
+        for node in body:
+            self.visit(node)
+        self._scope.pop()
+
+    def visit_FunctionDef(self, node: ast.FunctionDef | ast.AsyncFunctionDef) -> None:
+        # Decorators and defaults are evaluated in the enclosing scope.
+        for deco in node.decorator_list:
+            self.visit(deco)
+        self.visit(node.args)
+        self._enter(node.name, True, node.body)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Lambda(self, node: ast.Lambda) -> None:
+        self.visit(node.args)
+        self._enter("<lambda>", True, [node.body])
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        for child in (*node.decorator_list, *node.bases, *node.keywords):
+            self.visit(child)
+        self._enter(node.name, False, node.body)
+
+    def _comprehension(self, node: t.Any, name: str, parts: list[ast.AST]) -> None:
+        # The first iterable is evaluated in the enclosing scope. List,
+        # set and dict comprehensions are inlined from Python 3.12.
+        first, *rest = node.generators
+        self.visit(first.iter)
+
+        body = [first.target, *first.ifs, *rest, *parts]
+        if sys.version_info >= (3, 12) and name != "<genexpr>":
+            for child in body:
+                self.visit(child)
+        else:
+            self._enter(name, True, body)
+
+    def visit_ListComp(self, node: ast.ListComp) -> None:
+        self._comprehension(node, "<listcomp>", [node.elt])
+
+    def visit_SetComp(self, node: ast.SetComp) -> None:
+        self._comprehension(node, "<setcomp>", [node.elt])
+
+    def visit_DictComp(self, node: ast.DictComp) -> None:
+        self._comprehension(node, "<dictcomp>", [node.key, node.value])
+
+    def visit_GeneratorExp(self, node: ast.GeneratorExp) -> None:
+        self._comprehension(node, "<genexpr>", [node.elt])
+
+    def visit_Call(self, node: ast.Call) -> None:
+        import ast
+
+        name = _name(node.func)
+        if name in self.hybrids:
+            # From Python 3.11, method calls are reported at the line of
+            # the method name rather than the start of the expression.
+            line = node.lineno
+            if sys.version_info >= (3, 11) and isinstance(node.func, ast.Attribute):
+                line = node.func.end_lineno or line
+
+            self.sites.append(
+                CallSite(
+                    self.file,
+                    self.qualname,
+                    line,
+                    name,
+                    _is_awaited(node, self.parents),
+                    "await" in self.lines[line - 1],
+                )
+            )
+
+        self.generic_visit(node)
+
+
+def _locate(package: str) -> Path:
+    if os.path.isdir(package):
+        return Path(package).resolve()
+
+    from importlib.util import find_spec
+
+    spec = find_spec(package)
+    if spec is None or not spec.submodule_search_locations:
+        raise ValueError(f"{package!r} is not a directory or an importable package")
+
+    return Path(list(spec.submodule_search_locations)[0]).resolve()
+
+
+def analyse(package: str) -> Analysis:
+    """Find and classify every call to a hybrid callable in `package`,
+    which can be a directory or the name of an importable package.
+    """
+
+    import ast
+    import tokenize
+
+    root = _locate(package)
+    trees: list[tuple[str, list[str], ast.Module]] = []
+    collector = _Collector()
+
+    for path in sorted(root.rglob("*.py")):
+        file = path.relative_to(root.parent).as_posix()
+        try:
+            with tokenize.open(path) as f:
+                source = f.read()
+            tree = ast.parse(source, file)
+        except (SyntaxError, UnicodeDecodeError) as exc:
+            _log.warning(f"Skipping {file!r}, which could not be parsed: {exc}")
+            continue
+
+        collector.collect(file, tree)
+        trees.append((file, source.splitlines(), tree))
+
+    collector.finish()
+    sites = []
+    for file, lines, tree in trees:
+        visitor = _Visitor(file, lines, tree, collector.hybrids)
+        visitor.visit(tree)
+        sites.extend(visitor.sites)
+
+    return Analysis(root.name, len(trees), sites, collector.missing)
+
+
+def load_dispatch_index(
+    path: str | os.PathLike[str], *, root: str | None = None
+) -> int:
+    """Load an index written by `python -m xsync.analyse`, so hybrid
+    calls made from the sites in it are dispatched without checking the
+    calling line. Returns the number of sites loaded.
+
+    File names in the index are relative to the directory containing
+    the analysed package. By default, this is found by looking the
+    package up, but it can be given as `root`.
+    """
+
+    import json
+
+    with open(path) as f:
+        data = json.load(f)
+
+    if data.get("version") != INDEX_VERSION:
+        raise ValueError(f"unsupported dispatch index version {data.get('version')!r}")
+
+    # Line numbers of multi-line calls, and which expressions get their
+    # own code objects, vary between Python versions.
+    if data["python"] != _python():
+        _log.warning(
+            f"Not loading {os.fspath(path)!r}, which was created for Python "
+            f"{data['python']} rather than {_python()}"
+        )
+        return 0
+
+    if root is None:
+        root = str(_locate(data["package"]).parent)
+
+    index: dict[tuple[str, str, int], bool | None] = {}
+    for file, qualname, line, awaited in data["sites"]:
+        # Code objects only have a qualified name from Python 3.11.
+        if sys.version_info < (3, 11):
+            qualname = qualname.rpartition(".")[2]
+
+        key = (os.path.normpath(os.path.join(root, file)), qualname, line)
+        index[key] = awaited if index.get(key, awaited) == awaited else None
+
+    loaded = {k: v for k, v in index.items() if v is not None}
+    utils._index = {**(utils._index or {}), **loaded}
+    utils._awaited.clear()
+    _log.info(f"Loaded {len(loaded):,} call site(s) from {os.fspath(path)!r}")
+    return len(loaded)
+
+
+def main(argv: list[str] | None = None) -> int:
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(
+        prog="python -m xsync.analyse",
+        description="Find and classify calls to hybrid callables.",
+    )
+    parser.add_argument("package", help="a package name or directory")
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="xsync-index.json",
+        help="where to write the dispatch index (default: %(default)s)",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        analysis = analyse(args.package)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    awaited = sum(s.awaited for s in analysis.sites)
+    print(
+        f"Analysed {analysis.files:,} file(s): {len(analysis.sites):,} hybrid "
+        f"call site(s), {awaited:,} awaited"
+    )
+
+    if analysis.misdetected:
+        print("\nCall sites runtime detection gets wrong:")
+        for site in analysis.misdetected:
+            kind = "awaited" if site.awaited else "not awaited"
+            print(
+                f"  {site.file}:{site.line} in {site.qualname}: "
+                f"{site.callee}() is {kind}"
+            )
+
+    if analysis.missing:
+        print("\nHybrids with no async implementation:")
+        for missing in analysis.missing:
+            print(f"  {missing.file}:{missing.line}: {missing.name}")
+
+    with open(args.output, "w") as f:
+        json.dump(analysis.as_index(), f)
+        f.write("\n")
+    print(f"\nWrote the dispatch index to {args.output}")
+
+    return 1 if analysis.missing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
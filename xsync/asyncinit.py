@@ -28,11 +28,13 @@
 
 from __future__ import annotations
 
-import inspect
-import logging
+import sys
 import typing as t
+from functools import wraps
 
-_log = logging.getLogger(__name__)
+from xsync.utils import get_logger, is_awaited
+
+_log = get_logger(__name__)
 
 if t.TYPE_CHECKING:
     AsyncT_co = t.TypeVar("AsyncT_co", bound="AsyncInitMixin", covariant=True)
@@ -40,42 +42,47 @@ if t.TYPE_CHECKING:
 
 class AsyncInitMixin:
     __ainit__: t.Callable[..., t.Any]
-    _args: tuple[t.Any, ...]
-    _kwargs: dict[str, t.Any]
-
-    def __new__(
-        cls: type[AsyncInitMixin], *args: t.Any, **kwargs: t.Any
-    ) -> AsyncInitMixin:
-        obj = super(AsyncInitMixin, cls).__new__(cls)
-        orig_init = cls.__init__
+    _xsync_init_args: tuple[tuple[t.Any, ...], dict[str, t.Any]]
 
-        def __init__(self: AsyncInitMixin, *args: t.Any, **kwargs: t.Any) -> None:
-            ctx = inspect.stack()[1].code_context
+    def __init_subclass__(cls, **kwargs: t.Any) -> None:
+        super().__init_subclass__(**kwargs)
 
-            if not ctx or "await" not in ctx[0]:
-                _log.debug(f"Initialising {cls.__name__!r} normally")
-                return orig_init(obj, *args, **kwargs)
-
-            cls._args = args
-            cls._kwargs = kwargs
-
-        setattr(cls, "__init__", __init__)
+        # The initialiser is wrapped once, when the class is created.
+        # Arguments for an async initialisation are kept on the instance
+        # being created, so concurrent initialisations of the same class
+        # don't interfere with each other.
+        orig_init = cls.__init__
+        if not getattr(orig_init, "__xsync_wrapped__", False) or (
+            "__init__" in vars(cls)
+        ):
+            setattr(cls, "__init__", _wrap_init(cls, orig_init))
 
         if not hasattr(cls, "__ainit__"):
 
-            async def __ainit__(self: AsyncInitMixin) -> None:
-                ...
+            async def __ainit__(self: AsyncInitMixin) -> None: ...
 
             setattr(cls, "__ainit__", __ainit__)
 
-        return obj
-
     def __await__(self: AsyncT_co) -> t.Generator[t.Any, t.Any, AsyncT_co]:
         async def main() -> AsyncInitMixin:
             _log.debug(f"Initialising {self.__class__.__name__!r} asynchronously")
-            await self.__ainit__(*self.__class__._args, *self.__class__._kwargs)
-            del self.__class__._args
-            del self.__class__._kwargs
+            args, kwargs = self.__dict__.pop("_xsync_init_args", ((), {}))
+            await self.__ainit__(*args, **kwargs)
             return self
 
         return main().__await__()  # type: ignore
+
+
+def _wrap_init(
+    cls: type[AsyncInitMixin], orig_init: t.Callable[..., None]
+) -> t.Callable[..., None]:
+    @wraps(orig_init)
+    def __init__(self: AsyncInitMixin, *args: t.Any, **kwargs: t.Any) -> None:
+        if not is_awaited(sys._getframe(1)):
+            _log.debug(f"Initialising {cls.__name__!r} normally")
+            return orig_init(self, *args, **kwargs)
+
+        self._xsync_init_args = (args, kwargs)
+
+    setattr(__init__, "__xsync_wrapped__", True)
+    return __init__
@@ -0,0 +1,358 @@
+# Copyright (c) 2022-present, Ethan Henderson
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from __future__ import annotations
+
+import sys
+import typing as t
+from contextvars import copy_context
+from functools import partial
+
+if t.TYPE_CHECKING:
+    import asyncio
+
+    from xsync.types import FuncT
+
+T = t.TypeVar("T")
+
+
+class Waker:
+    """Wakes a task waiting on it, from any thread."""
+
+    def wake(self) -> None:
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        raise NotImplementedError
+
+    async def wait(self, timeout: float | None) -> None:
+        raise NotImplementedError
+
+
+class Backend:
+    """The primitives xsync needs from an async library.
+
+    The backend for the running async library is returned by
+    `current()`. Libraries built on top of others, such as anyio, use
+    the backend for whichever library they're running on, and uvloop
+    uses the asyncio backend.
+    """
+
+    name: str
+
+    def completed(self, value: t.Any, exc: BaseException | None) -> t.Awaitable[t.Any]:
+        raise NotImplementedError
+
+    async def wait_for(self, aw: t.Awaitable[T], timeout: float) -> T:
+        raise NotImplementedError
+
+    def waker(self) -> Waker:
+        raise NotImplementedError
+
+    async def to_thread(self, func: t.Callable[[], T]) -> T:
+        raise NotImplementedError
+
+    async def hedge(
+        self,
+        start: t.Callable[[], t.Awaitable[t.Any]],
+        delay: float | None,
+        max_hedges: int,
+    ) -> tuple[int | None, t.Any, int]:
+        # Returns the index of the winning call (if any), its result or
+        # the last error, and the number of calls made.
+        raise NotImplementedError
+
+
+class _Done:
+    __slots__ = ("value", "exc")
+
+    def __init__(self, value: t.Any, exc: BaseException | None) -> None:
+        self.value = value
+        self.exc = exc
+
+    def __await__(self) -> t.Generator[t.Any, None, t.Any]:
+        if self.exc is not None:
+            raise self.exc
+        return self.value
+        yield
+
+
+class _AsyncioWaker(Waker):
+    __slots__ = ("loop", "fut")
+
+    def __init__(self) -> None:
+        import asyncio
+
+        self.loop = asyncio.get_running_loop()
+        self.fut: asyncio.Future[None] = self.loop.create_future()
+
+    def wake(self) -> None:
+        self.loop.call_soon_threadsafe(_set_result, self.fut)
+
+    def reset(self) -> None:
+        if self.fut.done():
+            self.fut = self.loop.create_future()
+
+    async def wait(self, timeout: float | None) -> None:
+        import asyncio
+
+        await asyncio.wait({self.fut}, timeout=timeout)
+
+
+def _set_result(fut: asyncio.Future[None]) -> None:
+    if not fut.done():
+        fut.set_result(None)
+
+
+class AsyncioBackend(Backend):
+    name = "asyncio"
+
+    def completed(self, value: t.Any, exc: BaseException | None) -> t.Awaitable[t.Any]:
+        import asyncio
+
+        # A completed future, rather than any awaitable, so it can be
+        # passed to things like `asyncio.gather` without being wrapped.
+        fut: asyncio.Future[t.Any] = asyncio.get_running_loop().create_future()
+        if exc is None:
+            fut.set_result(value)
+        else:
+            fut.set_exception(exc)
+        return fut
+
+    async def wait_for(self, aw: t.Awaitable[T], timeout: float) -> T:
+        import asyncio
+
+        try:
+            return await asyncio.wait_for(aw, timeout)
+        except asyncio.TimeoutError:
+            # Only the same as the builtin from Python 3.11.
+            raise TimeoutError from None
+
+    def waker(self) -> Waker:
+        return _AsyncioWaker()
+
+    async def to_thread(self, func: t.Callable[[], T]) -> T:
+        import asyncio
+
+        ctx = copy_context()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, partial(ctx.run, func))
+
+    async def hedge(
+        self,
+        start: t.Callable[[], t.Awaitable[t.Any]],
+        delay: float | None,
+        max_hedges: int,
+    ) -> tuple[int | None, t.Any, int]:
+        import asyncio
+
+        tasks: list[asyncio.Future[t.Any]] = [asyncio.ensure_future(start())]
+        pending = set(tasks)
+        error: BaseException | None = None
+
+        try:
+            while pending:
+                can_hedge = delay is not None and len(tasks) <= max_hedges
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=delay if can_hedge else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+
+                if not done:
+                    # Nothing has returned within the delay, so try
+                    # again alongside the calls already in flight.
+                    hedge = asyncio.ensure_future(start())
+                    tasks.append(hedge)
+                    pending.add(hedge)
+                    continue
+
+                # A failure is only reported if nothing else succeeds.
+                for task in sorted(done, key=tasks.index):
+                    if task.cancelled():
+                        continue
+
+                    exc = task.exception()
+                    if exc is None:
+                        return tasks.index(task), task.result(), len(tasks)
+                    error = exc
+
+            return None, error or asyncio.CancelledError(), len(tasks)
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+class _TrioWaker(Waker):
+    __slots__ = ("token", "event")
+
+    def __init__(self) -> None:
+        import trio
+
+        self.token = trio.lowlevel.current_trio_token()
+        self.event = trio.Event()
+
+    def wake(self) -> None:
+        import trio
+
+        try:
+            self.token.run_sync_soon(self.event.set)
+        except trio.RunFinishedError:
+            pass
+
+    def reset(self) -> None:
+        import trio
+
+        if self.event.is_set():
+            self.event = trio.Event()
+
+    async def wait(self, timeout: float | None) -> None:
+        import math
+
+        import trio
+
+        with trio.move_on_after(math.inf if timeout is None else timeout):
+            await self.event.wait()
+
+
+class TrioBackend(Backend):
+    name = "trio"
+
+    def completed(self, value: t.Any, exc: BaseException | None) -> t.Awaitable[t.Any]:
+        return _Done(value, exc)
+
+    async def wait_for(self, aw: t.Awaitable[T], timeout: float) -> T:
+        import trio
+
+        with trio.move_on_after(timeout) as scope:
+            return await aw
+
+        assert scope.cancelled_caught
+        raise TimeoutError
+
+    def waker(self) -> Waker:
+        return _TrioWaker()
+
+    async def to_thread(self, func: t.Callable[[], T]) -> T:
+        import trio
+
+        ctx = copy_context()
+        return t.cast(T, await trio.to_thread.run_sync(ctx.run, func))
+
+    async def hedge(
+        self,
+        start: t.Callable[[], t.Awaitable[t.Any]],
+        delay: float | None,
+        max_hedges: int,
+    ) -> tuple[int | None, t.Any, int]:
+        import trio
+
+        winner: list[tuple[int, t.Any]] = []
+        failures: list[BaseException] = []
+        calls = 0
+        running = 0
+
+        async def attempt(index: int, scope: trio.CancelScope) -> None:
+            nonlocal running
+
+            try:
+                value = await start()
+            except Exception as exc:
+                failures.append(exc)
+            else:
+                if not winner:
+                    winner.append((index, value))
+                scope.cancel()
+            finally:
+                running -= 1
+                if not running and failures:
+                    # Every call made so far has failed.
+                    scope.cancel()
+
+        async with trio.open_nursery() as nursery:
+            scope = nursery.cancel_scope
+            while True:
+                running += 1
+                nursery.start_soon(attempt, calls, scope)
+                calls += 1
+
+                if delay is None or calls > max_hedges:
+                    break
+                await trio.sleep(delay)
+
+        if winner:
+            return winner[0][0], winner[0][1], calls
+        return None, failures[-1], calls
+
+
+_asyncio = AsyncioBackend()
+_trio = TrioBackend()
+
+
+def current() -> Backend:
+    """Return the backend for the async library running in the current
+    thread.
+    """
+
+    # Neither library can be running if it hasn't been imported. asyncio
+    # is checked first, as it's cheap to check for, whereas checking for
+    # trio means raising an exception when it isn't running.
+    asyncio = sys.modules.get("asyncio")
+    if asyncio is not None and asyncio._get_running_loop() is not None:
+        return _asyncio
+
+    trio = sys.modules.get("trio")
+    if trio is not None:
+        try:
+            trio.lowlevel.current_task()
+        except RuntimeError:
+            pass
+        else:
+            return _trio
+
+    raise RuntimeError("no supported async library (asyncio or trio) is running")
+
+
+def new_event_loop() -> asyncio.AbstractEventLoop:
+    # Applications using uvloop get uvloop loops, even if they started
+    # it with `uvloop.run` rather than by installing its policy.
+    uvloop = sys.modules.get("uvloop")
+    if uvloop is not None:
+        return t.cast("asyncio.AbstractEventLoop", uvloop.new_event_loop())
+
+    import asyncio
+
+    return asyncio.new_event_loop()
+
+
+async def to_thread(func: FuncT, *args: t.Any, **kwargs: t.Any) -> t.Any:
+    """Run a blocking callable in a worker thread without blocking the
+    event loop, using the running async library's own thread pool.
+    """
+
+    return await current().to_thread(partial(func, *args, **kwargs))
@@ -0,0 +1,297 @@
+# Copyright (c) 2022-present, Ethan Henderson
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from __future__ import annotations
+
+import threading
+import time
+import typing as t
+from collections import deque
+from functools import wraps
+
+from xsync import errors
+from xsync.utils import get_logger
+
+if t.TYPE_CHECKING:
+    from xsync.types import CallT, FuncT
+
+_log = get_logger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_MAX_KEYS = 10_000
+_TRANSITIONS = 100
+
+
+class _Circuit:
+    __slots__ = ("key", "state", "outcomes", "opened_at", "probes", "successes")
+
+    def __init__(self, key: t.Hashable, window: int) -> None:
+        self.key = key
+        self.state = CLOSED
+        self.outcomes: deque[tuple[bool, bool]] = deque(maxlen=window)
+        self.opened_at = 0.0
+        self.probes = 0
+        self.successes = 0
+
+
+class CircuitBreaker:
+    """A circuit breaker which can be shared by the sync and async
+    implementations of hybrid callables.
+
+    The circuit opens when, out of the last `window` calls, the
+    proportion which failed reaches `failure_rate`, or the proportion
+    which took at least `slow_call` seconds reaches `slow_rate`. While
+    open, calls fail immediately with `CircuitOpen`. After
+    `reset_timeout` seconds, up to `half_open_calls` probe calls are let
+    through, and the circuit closes again if they all succeed.
+
+    If `key` is given, it is called with the arguments of each call, and
+    a separate circuit is kept for each key it returns. If `shed_after`
+    is given, calls which wait longer than that for the hybrid's limiter
+    fail with `LoadShed` instead.
+
+    Args:
+        failure_rate: The proportion of failed calls which opens the
+            circuit.
+        slow_call: The number of seconds after which a call is counted
+            as slow. Calls are not counted as slow if not given.
+        slow_rate: The proportion of slow calls which opens the circuit.
+        window: The number of recent calls the rates are worked out
+            from.
+        min_calls: The number of calls needed before the circuit can
+            open.
+        reset_timeout: The number of seconds the circuit stays open for
+            before probing.
+        half_open_calls: The number of probe calls which need to succeed
+            before the circuit closes.
+        failure_types: The exceptions which count as failures.
+        key: A function returning the circuit to use for a call.
+        shed_after: The number of seconds a call can wait for the
+            hybrid's limiter before it is shed.
+    """
+
+    def __init__(
+        self,
+        *,
+        failure_rate: float = 0.5,
+        slow_call: float | None = None,
+        slow_rate: float = 0.5,
+        window: int = 20,
+        min_calls: int = 10,
+        reset_timeout: float = 30.0,
+        half_open_calls: int = 1,
+        failure_types: tuple[type[BaseException], ...] = (Exception,),
+        key: t.Callable[..., t.Hashable] | None = None,
+        shed_after: float | None = None,
+    ) -> None:
+        if not 0 < failure_rate <= 1 or not 0 < slow_rate <= 1:
+            raise ValueError("rates must be greater than 0 and at most 1")
+        if window < 1 or min_calls < 1 or half_open_calls < 1:
+            raise ValueError("window, min_calls and half_open_calls must be positive")
+
+        self.failure_rate = failure_rate
+        self.slow_call = slow_call
+        self.slow_rate = slow_rate
+        self.window = window
+        self.min_calls = min(min_calls, window)
+        self.reset_timeout = reset_timeout
+        self.half_open_calls = half_open_calls
+        self.failure_types = failure_types
+        self.key = key
+        self.shed_after = shed_after
+        self.rejected = 0
+        self.shed = 0
+        self.transitions: deque[tuple[float, t.Hashable, str, str]] = deque(
+            maxlen=_TRANSITIONS
+        )
+        self._circuits: dict[t.Hashable, _Circuit] = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"<CircuitBreaker {self.as_dict()}>"
+
+    def state(self, key: t.Hashable = None) -> str:
+        """Return the state of the circuit for `key` (or the only
+        circuit, if keys aren't used).
+        """
+
+        with self._lock:
+            circuit = self._circuits.get(key)
+            return CLOSED if circuit is None else circuit.state
+
+    def as_dict(self) -> dict[str, t.Any]:
+        with self._lock:
+            states = [c.state for c in self._circuits.values()]
+            transitions = list(self.transitions)
+
+        return {
+            "circuits": len(states),
+            "open": states.count(OPEN),
+            "half_open": states.count(HALF_OPEN),
+            "rejected": self.rejected,
+            "shed": self.shed,
+            "transitions": transitions,
+        }
+
+    def _circuit(self, args: tuple[t.Any, ...], kwargs: dict[str, t.Any]) -> _Circuit:
+        key = None if self.key is None else self.key(*args, **kwargs)
+        circuit = self._circuits.get(key)
+        if circuit is None:
+            with self._lock:
+                circuit = self._circuits.get(key)
+                if circuit is None:
+                    if len(self._circuits) >= _MAX_KEYS:
+                        del self._circuits[next(iter(self._circuits))]
+                    circuit = self._circuits[key] = _Circuit(key, self.window)
+
+        return circuit
+
+    def _move(self, circuit: _Circuit, state: str, now: float) -> None:
+        self.transitions.append((time.time(), circuit.key, circuit.state, state))
+        circuit.state = state
+        circuit.probes = 0
+        circuit.successes = 0
+
+        name = "circuit" if circuit.key is None else f"circuit for {circuit.key!r}"
+        if state == OPEN:
+            circuit.opened_at = now
+            _log.warning(f"The {name} has opened")
+        elif state == CLOSED:
+            circuit.outcomes.clear()
+            _log.info(f"The {name} has closed")
+
+    def _enter(self, circuit: _Circuit, name: str) -> bool:
+        # Returns whether the call is a probe.
+        if circuit.state == CLOSED:
+            return False
+
+        with self._lock:
+            now = time.monotonic()
+            if circuit.state == OPEN:
+                retry_after = circuit.opened_at + self.reset_timeout - now
+                if retry_after > 0:
+                    self.rejected += 1
+                    raise errors.CircuitOpen(name, retry_after)
+                self._move(circuit, HALF_OPEN, now)
+
+            if circuit.state == HALF_OPEN:
+                if circuit.probes >= self.half_open_calls:
+                    self.rejected += 1
+                    raise errors.CircuitOpen(name, 0.0)
+                circuit.probes += 1
+                return True
+
+            return False
+
+    def _exit(
+        self,
+        circuit: _Circuit,
+        probe: bool,
+        start: float,
+        exc: BaseException | None,
+    ) -> None:
+        now = time.monotonic()
+        failed = isinstance(exc, self.failure_types)
+        if isinstance(exc, errors.LoadShed):
+            self.shed += 1
+            failed = False
+        slow = self.slow_call is not None and now - start >= self.slow_call
+
+        with self._lock:
+            if probe:
+                if circuit.state != HALF_OPEN:
+                    return
+                if failed or slow:
+                    self._move(circuit, OPEN, now)
+                elif exc is not None:
+                    # Neither a success nor a failure, so another call
+                    # can probe instead.
+                    circuit.probes -= 1
+                else:
+                    circuit.successes += 1
+                    if circuit.successes >= self.half_open_calls:
+                        self._move(circuit, CLOSED, now)
+                return
+
+            if circuit.state != CLOSED or (exc is not None and not failed):
+                return
+
+            circuit.outcomes.append((failed, slow))
+            calls = len(circuit.outcomes)
+            if calls < self.min_calls:
+                return
+
+            failures = sum(f for f, _ in circuit.outcomes)
+            slow_calls = sum(s for _, s in circuit.outcomes)
+            if (
+                failures / calls >= self.failure_rate
+                or slow_calls / calls >= self.slow_rate
+            ):
+                self._move(circuit, OPEN, now)
+
+
+def guarded_sync(func: FuncT, breaker: CircuitBreaker, name: str) -> FuncT:
+    @wraps(func)
+    def guarded(*args: t.Any, **kwargs: t.Any) -> t.Any:
+        circuit = breaker._circuit(args, kwargs)
+        probe = breaker._enter(circuit, name)
+        start = time.monotonic()
+
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as exc:
+            breaker._exit(circuit, probe, start, exc)
+            raise
+
+        breaker._exit(circuit, probe, start, None)
+        return result
+
+    return guarded
+
+
+def guarded_async(call: CallT, breaker: CircuitBreaker, name: str) -> CallT:
+    async def guarded(
+        impl: FuncT, args: tuple[t.Any, ...], kwargs: dict[str, t.Any]
+    ) -> t.Any:
+        circuit = breaker._circuit(args, kwargs)
+        probe = breaker._enter(circuit, name)
+        start = time.monotonic()
+
+        try:
+            result = await call(impl, args, kwargs)
+        except BaseException as exc:
+            breaker._exit(circuit, probe, start, exc)
+            raise
+
+        breaker._exit(circuit, probe, start, None)
+        return result
+
+    return guarded
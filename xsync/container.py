@@ -0,0 +1,284 @@
+# Copyright (c) 2022-present, Ethan Henderson
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from __future__ import annotations
+
+import time
+import typing as t
+
+from xsync import errors
+from xsync.utils import get_logger, maybe_await
+
+if t.TYPE_CHECKING:
+    from types import TracebackType
+
+    from xsync.asyncinit import AsyncInitMixin
+
+    ComponentT = t.TypeVar("ComponentT", bound=AsyncInitMixin)
+
+_log = get_logger(__name__)
+
+
+class _Component:
+    __slots__ = ("cls", "args", "kwargs", "depends_on", "inject")
+
+    def __init__(
+        self,
+        cls: type[AsyncInitMixin],
+        args: tuple[t.Any, ...],
+        kwargs: dict[str, t.Any],
+        depends_on: (
+            t.Iterable[type[AsyncInitMixin]] | t.Mapping[str, type[AsyncInitMixin]]
+        ),
+    ) -> None:
+        self.cls = cls
+        self.args = args
+        self.kwargs = kwargs
+        self.inject: dict[str, type[AsyncInitMixin]] = {}
+
+        if isinstance(depends_on, t.Mapping):
+            self.inject = dict(depends_on)
+            self.depends_on = tuple(depends_on.values())
+        else:
+            self.depends_on = tuple(depends_on)
+
+
+class StartupReport:
+    """Timings for each component started by a `Container`, in seconds
+    relative to when the container started.
+    """
+
+    def __init__(
+        self, timings: dict[str, tuple[float, float]], critical_path: list[str]
+    ) -> None:
+        self.timings = timings
+        self.critical_path = critical_path
+
+    def __str__(self) -> str:
+        lines = [f"Started {len(self.timings)} component(s) in {self.total:.3f}s"]
+
+        for name, (start, end) in sorted(self.timings.items(), key=lambda i: i[1]):
+            marker = "*" if name in self.critical_path else " "
+            lines.append(
+                f" {marker} {name:<30} {start:8.3f}s -> {end:8.3f}s "
+                f"({end - start:.3f}s)"
+            )
+
+        lines.append(f"Critical path: {' -> '.join(self.critical_path)}")
+        return "\n".join(lines)
+
+    @property
+    def total(self) -> float:
+        return max((end for _, end in self.timings.values()), default=0.0)
+
+
+class Container:
+    """A set of `AsyncInitMixin` components which depend on each other.
+
+    When started, every component is initialised asynchronously as soon
+    as the components it depends on are ready, so independent components
+    are initialised concurrently. Components are closed in the reverse
+    order when stopped, using their `aclose()` or `close()` method if
+    they have one.
+
+    Containers can also be used with `async with`.
+    """
+
+    def __init__(self) -> None:
+        self._components: dict[type[AsyncInitMixin], _Component] = {}
+        self._instances: dict[type[AsyncInitMixin], t.Any] = {}
+        self.report: StartupReport | None = None
+
+    def __getitem__(self, cls: type[ComponentT]) -> ComponentT:
+        try:
+            return t.cast("ComponentT", self._instances[cls])
+        except KeyError:
+            raise KeyError(f"{cls.__qualname__!r} has not been started") from None
+
+    async def __aenter__(self) -> Container:
+        await self.start()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        await self.stop()
+
+    def add(
+        self,
+        cls: type[AsyncInitMixin],
+        *args: t.Any,
+        depends_on: (
+            t.Iterable[type[AsyncInitMixin]] | t.Mapping[str, type[AsyncInitMixin]]
+        ) = (),
+        **kwargs: t.Any,
+    ) -> None:
+        """Add a component to the container.
+
+        `args` and `kwargs` are passed when the component is created. If
+        `depends_on` is a mapping, the started dependencies are also
+        passed as keyword arguments under the given names.
+        """
+
+        if cls in self._components:
+            raise errors.DependencyError(f"{cls.__qualname__!r} has already been added")
+
+        self._components[cls] = _Component(cls, args, kwargs, depends_on)
+
+    def _check(self) -> None:
+        for component in self._components.values():
+            for dep in component.depends_on:
+                if dep not in self._components:
+                    raise errors.DependencyError(
+                        f"{component.cls.__qualname__!r} depends on "
+                        f"{dep.__qualname__!r}, which has not been added"
+                    )
+
+        state: dict[type[AsyncInitMixin], bool] = {}
+
+        def visit(cls: type[AsyncInitMixin], path: list[str]) -> None:
+            if state.get(cls) is False:
+                cycle = path[path.index(cls.__qualname__) :] + [cls.__qualname__]
+                raise errors.DependencyError(
+                    f"Dependency cycle found: {' -> '.join(cycle)}"
+                )
+            if cls in state:
+                return
+
+            state[cls] = False
+            for dep in self._components[cls].depends_on:
+                visit(dep, path + [cls.__qualname__])
+            state[cls] = True
+
+        for cls in self._components:
+            visit(cls, [])
+
+    async def start(self) -> StartupReport:
+        """Initialise every component, and return a report of how long
+        each one took.
+        """
+
+        import asyncio
+
+        self._check()
+        origin = time.monotonic()
+        timings: dict[type[AsyncInitMixin], tuple[float, float]] = {}
+        tasks: dict[type[AsyncInitMixin], asyncio.Future[t.Any]] = {}
+
+        async def start_one(component: _Component) -> t.Any:
+            if component.depends_on:
+                await asyncio.gather(*(tasks[dep] for dep in component.depends_on))
+
+            kwargs = dict(component.kwargs)
+            for name, dep in component.inject.items():
+                kwargs[name] = tasks[dep].result()
+
+            name = component.cls.__qualname__
+            _log.debug(f"Starting {name!r}")
+            start = time.monotonic() - origin
+            obj = await component.cls(*component.args, **kwargs)
+            timings[component.cls] = (start, time.monotonic() - origin)
+            self._instances[component.cls] = obj
+            return obj
+
+        for cls, component in self._components.items():
+            tasks[cls] = asyncio.ensure_future(start_one(component))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            await self.stop()
+            raise
+
+        self.report = StartupReport(
+            {cls.__qualname__: span for cls, span in timings.items()},
+            self._critical_path(timings),
+        )
+        _log.info(str(self.report))
+        return self.report
+
+    def _critical_path(
+        self, timings: dict[type[AsyncInitMixin], tuple[float, float]]
+    ) -> list[str]:
+        # Work backwards from the last component to become ready,
+        # following whichever dependency was ready last each time.
+        if not timings:
+            return []
+
+        cls: type[AsyncInitMixin] | None = max(timings, key=lambda c: timings[c][1])
+        path = []
+
+        while cls is not None:
+            path.append(cls.__qualname__)
+            deps = self._components[cls].depends_on
+            cls = max(deps, key=lambda c: timings[c][1]) if deps else None
+
+        return path[::-1]
+
+    async def stop(self) -> None:
+        """Close every started component, each only after everything
+        depending on it has been closed.
+        """
+
+        import asyncio
+
+        tasks: dict[type[AsyncInitMixin], asyncio.Future[None]] = {}
+        dependents: dict[type[AsyncInitMixin], list[type[AsyncInitMixin]]] = {
+            cls: [] for cls in self._components
+        }
+        for component in self._components.values():
+            for dep in component.depends_on:
+                dependents[dep].append(component.cls)
+
+        async def stop_one(cls: type[AsyncInitMixin]) -> None:
+            await asyncio.gather(
+                *(tasks[d] for d in dependents[cls]), return_exceptions=True
+            )
+
+            obj = self._instances.pop(cls, None)
+            if obj is None:
+                return
+
+            _log.debug(f"Stopping {cls.__qualname__!r}")
+            close = getattr(obj, "aclose", None) or getattr(obj, "close", None)
+            if close is not None:
+                await maybe_await(close())
+
+        for cls in self._components:
+            tasks[cls] = asyncio.ensure_future(stop_one(cls))
+
+        results = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
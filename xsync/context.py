@@ -0,0 +1,219 @@
+# Copyright (c) 2022-present, Ethan Henderson
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from __future__ import annotations
+
+import typing as t
+
+if t.TYPE_CHECKING:
+    from types import CodeType, TracebackType
+
+    from xsync.limits import Limiter
+    from xsync.types import FuncT
+
+# The code object of the function `contextlib.contextmanager` returns,
+# which is shared by every function it decorates.
+_helper_code: CodeType | None = None
+
+
+class HybridContextManager:
+    """A context manager which can be entered using both `with` and
+    `async with`.
+
+    The underlying context manager is not created until it is entered,
+    so the sync implementation is never set up when the object is used
+    asynchronously, and vice versa.
+    """
+
+    __slots__ = ("_func", "_get_coro", "_args", "_kwargs", "_limiter", "_cm")
+
+    def __init__(
+        self,
+        func: FuncT,
+        get_coro: t.Callable[[], FuncT],
+        args: tuple[t.Any, ...],
+        kwargs: dict[str, t.Any],
+        limiter: Limiter | None = None,
+    ) -> None:
+        self._func = func
+        self._get_coro = get_coro
+        self._args = args
+        self._kwargs = kwargs
+        self._limiter = limiter
+        self._cm: t.Any = None
+
+    def _release(self) -> None:
+        if self._limiter is not None:
+            self._limiter.release()
+
+    def __enter__(self) -> t.Any:
+        if self._limiter is not None:
+            self._limiter.acquire()
+
+        try:
+            self._cm = self._func(*self._args, **self._kwargs)
+            return self._cm.__enter__()
+        except BaseException:
+            self._release()
+            raise
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> bool | None:
+        cm, self._cm = self._cm, None
+
+        try:
+            return t.cast("bool | None", cm.__exit__(exc_type, exc_value, traceback))
+        finally:
+            self._release()
+
+    async def __aenter__(self) -> t.Any:
+        if self._limiter is not None:
+            await self._limiter.acquire_async()
+
+        try:
+            self._cm = self._get_coro()(*self._args, **self._kwargs)
+            return await self._cm.__aenter__()
+        except BaseException:
+            self._release()
+            raise
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> bool | None:
+        cm, self._cm = self._cm, None
+
+        try:
+            return t.cast(
+                "bool | None", await cm.__aexit__(exc_type, exc_value, traceback)
+            )
+        finally:
+            self._release()
+
+
+def hybrid_context_class(
+    cls: type,
+    get_coro: t.Callable[[], FuncT],
+    limiter: Limiter | None = None,
+) -> type:
+    """Return a subclass of the context manager class `cls` which can
+    also be entered using `async with`.
+
+    Instances are created and entered with `with` as normal. When
+    entered with `async with`, the async implementation is created with
+    the same arguments and entered instead.
+    """
+
+    class HybridContext(cls):  # type: ignore[misc]
+        def __init__(self, *args: t.Any, **kwargs: t.Any) -> None:
+            super().__init__(*args, **kwargs)
+            self.__xsync_args__ = (args, kwargs)
+            self.__xsync_cm__: t.Any = None
+
+        def __enter__(self) -> t.Any:
+            if limiter is not None:
+                limiter.acquire()
+
+            try:
+                return super().__enter__()
+            except BaseException:
+                if limiter is not None:
+                    limiter.release()
+                raise
+
+        def __exit__(
+            self,
+            exc_type: type[BaseException] | None,
+            exc_value: BaseException | None,
+            traceback: TracebackType | None,
+        ) -> bool | None:
+            try:
+                return t.cast(
+                    "bool | None", super().__exit__(exc_type, exc_value, traceback)
+                )
+            finally:
+                if limiter is not None:
+                    limiter.release()
+
+        async def __aenter__(self) -> t.Any:
+            if limiter is not None:
+                await limiter.acquire_async()
+
+            try:
+                args, kwargs = self.__xsync_args__
+                self.__xsync_cm__ = get_coro()(*args, **kwargs)
+                return await self.__xsync_cm__.__aenter__()
+            except BaseException:
+                if limiter is not None:
+                    limiter.release()
+                raise
+
+        async def __aexit__(
+            self,
+            exc_type: type[BaseException] | None,
+            exc_value: BaseException | None,
+            traceback: TracebackType | None,
+        ) -> bool | None:
+            cm, self.__xsync_cm__ = self.__xsync_cm__, None
+
+            try:
+                return t.cast(
+                    "bool | None", await cm.__aexit__(exc_type, exc_value, traceback)
+                )
+            finally:
+                if limiter is not None:
+                    limiter.release()
+
+    for attr in ("__module__", "__name__", "__qualname__", "__doc__"):
+        setattr(HybridContext, attr, getattr(cls, attr))
+
+    return HybridContext
+
+
+def is_context_factory(func: t.Any) -> bool:
+    if isinstance(func, type):
+        return hasattr(func, "__enter__")
+
+    global _helper_code
+
+    if _helper_code is None:
+        import contextlib
+
+        @contextlib.contextmanager
+        def helper() -> t.Iterator[None]:
+            yield
+
+        _helper_code = helper.__code__
+
+    return getattr(func, "__code__", None) is _helper_code
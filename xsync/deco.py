@@ -28,41 +28,83 @@
 
 from __future__ import annotations
 
-import inspect
-import logging
+import sys
 import typing as t
 from functools import wraps
 
-from xsync.utils import deprecated
+from xsync import diagnostics
+from xsync.utils import deprecated, get_logger, is_awaited
 
 if t.TYPE_CHECKING:
     from xsync.types import DecoT, FuncT
 
-_log = logging.getLogger(__name__)
+_log = get_logger(__name__)
+
+
+def _resolve_owner(func: FuncT) -> type | None:
+    path = func.__qualname__.split(".")[:-1]
+    if not path or "<locals>" in path:
+        return None
+
+    # Classes aren't created until after their methods are decorated,
+    # so this can only be done once the function is first called.
+    owner = func.__globals__.get(path[0])
+    for name in path[1:]:
+        owner = getattr(owner, name, None)
+
+    return owner if isinstance(owner, type) else None
 
 
 @deprecated("0.4", "as_hybrid")
 def maybe_async() -> DecoT:
     def decorator(func: FuncT) -> FuncT:
+        # Everything that doesn't depend on the arguments is worked out
+        # up front. The companion itself is looked up on each call so
+        # that rebinding it takes effect.
+        name = f"_async_{func.__name__}"
+        clsname = func.__qualname__.split(".")[0]
+        owner: type | None = None
+        resolved = False
+        sync_msg = f"Selected {func.__qualname__} to run (sync)"
+
         @wraps(func)
         def wrapper(*args: t.Any, **kwargs: t.Any) -> t.Any:
-            ctx = inspect.stack()[1].code_context
+            nonlocal owner, resolved
+
+            frame = sys._getframe(1)
 
-            if not ctx or "await" not in ctx[0]:
-                _log.info(f"Selected {func.__qualname__} to run (sync)")
+            if not is_awaited(frame):
+                _log.info(sync_msg)
+                if diagnostics.enabled:
+                    return diagnostics.run_checked(
+                        func, args, kwargs, frame, func.__qualname__
+                    )
                 return func(*args, **kwargs)
 
             if args:
                 # Account for classmethods.
-                n = args[0].__class__.__name__
-                clsname = n if n != "type" else args[0].__name__
+                first = args[0]
+                cls = first if isinstance(first, type) else type(first)
 
-                if func.__qualname__.split(".")[0] == clsname:
-                    meth = getattr(args[0], f"_async_{func.__name__}")
+                if cls.__name__ == clsname:
+                    meth = getattr(first, name)
                     _log.info(f"Selected {meth.__qualname__} to run (async meth)")
                     return meth(*args[1:], **kwargs)
 
-            meth = func.__globals__[f"_async_{func.__name__}"]
+            if not resolved:
+                # Functions without an owning class are only looked up
+                # once too.
+                owner = _resolve_owner(func)
+                resolved = True
+
+            if owner is not None:
+                # Static methods have no instance or class to look the
+                # companion up on.
+                meth = getattr(owner, name)
+                _log.info(f"Selected {meth.__qualname__} to run (async static meth)")
+                return meth(*args, **kwargs)
+
+            meth = func.__globals__[name]
             _log.info(f"Selected {meth.__qualname__} to run (async func)")
             return meth(*args, **kwargs)
 
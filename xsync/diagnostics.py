@@ -0,0 +1,172 @@
+# Copyright (c) 2022-present, Ethan Henderson
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+import typing as t
+
+from xsync.utils import get_logger
+
+if t.TYPE_CHECKING:
+    from types import FrameType
+
+    from xsync.stats import HybridStats
+    from xsync.types import FuncT
+
+_log = get_logger(__name__)
+
+# Checked by hybrids on every sync call, so kept as a plain module
+# global. Can also be switched on by setting XSYNC_BLOCKING_THRESHOLD.
+enabled = False
+_threshold = 0.1
+_log_interval = 60.0
+
+_sites: dict[tuple[str, int, str], BlockingSite] = {}
+_lock = threading.Lock()
+
+
+class BlockingSite:
+    """A call site at which a hybrid callable ran synchronously inside
+    a running event loop, blocking it.
+    """
+
+    __slots__ = ("filename", "lineno", "qualname", "count", "total", "max", "_logged")
+
+    def __init__(self, filename: str, lineno: int, qualname: str) -> None:
+        self.filename = filename
+        self.lineno = lineno
+        self.qualname = qualname
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._logged = float("-inf")
+
+    def __repr__(self) -> str:
+        return (
+            f"<BlockingSite {self.qualname!r} at {self.filename}:{self.lineno} "
+            f"count={self.count} total={self.total:.3f}s max={self.max:.3f}s>"
+        )
+
+
+def enable_blocking_detection(
+    threshold: float = 0.1, log_interval: float = 60.0
+) -> None:
+    """Start reporting hybrid calls which run synchronously inside a
+    running event loop and block it for at least `threshold` seconds.
+
+    Each offending call site is logged at most once every `log_interval`
+    seconds, and all of them are aggregated in `blocking_report()`.
+    """
+
+    global enabled, _threshold, _log_interval
+
+    _threshold = threshold
+    _log_interval = log_interval
+    enabled = True
+
+
+def disable_blocking_detection() -> None:
+    global enabled
+    enabled = False
+
+
+def blocking_report() -> list[BlockingSite]:
+    """Return every call site found blocking an event loop, worst
+    first.
+    """
+
+    with _lock:
+        sites = list(_sites.values())
+    return sorted(sites, key=lambda s: s.total, reverse=True)
+
+
+def reset_blocking_report() -> None:
+    with _lock:
+        _sites.clear()
+
+
+def _running_loop() -> bool:
+    import sys
+
+    # If asyncio hasn't been imported, no loop can be running.
+    asyncio = sys.modules.get("asyncio")
+    return asyncio is not None and asyncio._get_running_loop() is not None
+
+
+def run_checked(
+    func: FuncT,
+    args: tuple[t.Any, ...],
+    kwargs: dict[str, t.Any],
+    frame: FrameType,
+    qualname: str,
+    stats: HybridStats | None = None,
+) -> t.Any:
+    if not _running_loop():
+        return func(*args, **kwargs)
+
+    start = time.perf_counter()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        elapsed = time.perf_counter() - start
+        if elapsed >= _threshold:
+            _record(frame.f_code.co_filename, frame.f_lineno, qualname, elapsed)
+            if stats is not None:
+                stats.record_blocking(elapsed)
+
+
+def _record(filename: str, lineno: int, qualname: str, elapsed: float) -> None:
+    key = (filename, lineno, qualname)
+    now = time.monotonic()
+
+    with _lock:
+        site = _sites.get(key)
+        if site is None:
+            site = _sites[key] = BlockingSite(filename, lineno, qualname)
+
+        site.count += 1
+        site.total += elapsed
+        site.max = max(site.max, elapsed)
+
+        should_log = now - site._logged >= _log_interval
+        if should_log:
+            site._logged = now
+
+    if should_log:
+        _log.warning(
+            f"{qualname!r} blocked the event loop for {elapsed:.3f}s when called "
+            f"at {filename}:{lineno} ({site.count} time(s) so far)"
+        )
+
+
+_env_threshold = os.environ.get("XSYNC_BLOCKING_THRESHOLD")
+if _env_threshold:
+    enable_blocking_detection(float(_env_threshold))
@@ -0,0 +1,155 @@
+# Copyright (c) 2022-present, Ethan Henderson
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from __future__ import annotations
+
+import sys
+import typing as t
+
+from xsync import backends, errors
+
+if t.TYPE_CHECKING:
+    from types import CodeType, FrameType
+
+_DIRECT_CACHE_SIZE = 4096
+_direct: dict[tuple[CodeType, int], bool] = {}
+
+
+class _Suspended:
+    """An awaitable which drives a coroutine that has already been
+    started and has suspended.
+    """
+
+    __slots__ = ("_coro", "_yielded")
+
+    def __init__(self, coro: t.Coroutine[t.Any, t.Any, t.Any], yielded: t.Any) -> None:
+        self._coro = coro
+        self._yielded = yielded
+
+    def __await__(self) -> t.Generator[t.Any, t.Any, t.Any]:
+        coro, yielded = self._coro, self._yielded
+
+        # Equivalent to `yield from`, but starting from a value the
+        # coroutine has already yielded.
+        while True:
+            try:
+                sent = yield yielded
+            except GeneratorExit:
+                coro.close()
+                raise
+            except BaseException as exc:
+                try:
+                    yielded = coro.throw(exc)
+                except StopIteration as stop:
+                    return stop.value
+            else:
+                try:
+                    yielded = coro.send(sent)
+                except StopIteration as stop:
+                    return stop.value
+
+
+def awaited_directly(frame: FrameType) -> bool:
+    # Whether the call being made from `frame` is awaited straight away,
+    # so the coroutine it returns runs in the calling task, rather than
+    # being passed to something like `asyncio.gather` first.
+    key = (frame.f_code, frame.f_lasti)
+
+    try:
+        return _direct[key]
+    except KeyError:
+        pass
+
+    import dis
+
+    direct = False
+    for instr in dis.get_instructions(frame.f_code):
+        if instr.offset > frame.f_lasti:
+            direct = instr.opname == "GET_AWAITABLE"
+            break
+
+    if len(_direct) >= _DIRECT_CACHE_SIZE:
+        _direct.clear()
+
+    _direct[key] = direct
+    return direct
+
+
+def eager_task(coro: t.Coroutine[t.Any, t.Any, t.Any]) -> t.Awaitable[t.Any]:
+    # From Python 3.12, asyncio tasks can be started eagerly, which runs
+    # the coroutine up to its first suspension in its own task.
+    if sys.version_info >= (3, 12):
+        import asyncio
+
+        loop = asyncio._get_running_loop()
+        if loop is not None:
+            return asyncio.Task(coro, loop=loop, eager_start=True)
+
+    return coro
+
+
+def eager_start(coro: t.Coroutine[t.Any, t.Any, t.Any]) -> t.Awaitable[t.Any]:
+    # This works in the same way as Python 3.12's eager task factory,
+    # but without creating a task: the coroutine is run up to its first
+    # suspension straight away, and returned as a completed awaitable if
+    # it finishes. The coroutine stays bound to the calling task, so
+    # this must only be used for calls which that task awaits directly.
+    try:
+        yielded = coro.send(None)
+    except StopIteration as exc:
+        return backends.current().completed(exc.value, None)
+    except Exception as exc:
+        return backends.current().completed(None, exc)
+
+    return _Suspended(coro, yielded)
+
+
+def run_eager(coro: t.Coroutine[t.Any, t.Any, t.Any]) -> t.Any:
+    """Run a coroutine to completion without an event loop.
+
+    This only works if the coroutine doesn't need to suspend, for
+    example when it returns a cached value. If it does suspend, it is
+    closed and `CoroutineSuspended` is raised.
+    """
+
+    try:
+        # A bare yield (such as `asyncio.sleep(0)`) only asks to be
+        # resumed later, so the coroutine can be resumed straight away.
+        while coro.send(None) is None:
+            pass
+    except StopIteration as exc:
+        return exc.value
+    except RuntimeError as exc:
+        # asyncio primitives need a running loop before they can
+        # suspend, so they fail before getting that far.
+        if "no running event loop" not in str(exc):
+            raise
+        raise errors.CoroutineSuspended(coro) from exc
+
+    coro.close()
+    raise errors.CoroutineSuspended(coro)
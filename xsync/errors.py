@@ -48,6 +48,69 @@ class NoAsyncImplementation(XsyncError):
         )
 
 
+class NoSyncImplementation(XsyncError):
+    """Exception thrown when a class wrapped in the `@hybrid_class`
+    decorator defines an async method without a sync counterpart.
+    """
+
+    def __init__(self, coro: t.Callable[..., t.Any], name: str) -> None:
+        super().__init__(
+            f"{coro.__qualname__!r} does not have a sync counterpart named {name!r}"
+        )
+
+
+class CoroutineSuspended(XsyncError):
+    """Exception thrown when a coroutine being run without an event loop
+    needs to suspend.
+    """
+
+    def __init__(self, coro: t.Coroutine[t.Any, t.Any, t.Any]) -> None:
+        super().__init__(
+            f"{getattr(coro, '__qualname__', coro)!r} suspended, so could not be "
+            "run without an event loop"
+        )
+
+
+class DeadlineExceeded(XsyncError, TimeoutError):
+    """Exception thrown when a hybrid callable does not complete within
+    its timeout or the current deadline.
+    """
+
+    def __init__(self, func: t.Callable[..., t.Any]) -> None:
+        super().__init__(f"{func.__qualname__!r} did not complete within its deadline")
+
+
+class CircuitOpen(XsyncError):
+    """Exception thrown when a hybrid callable is called while its
+    circuit breaker is open.
+    """
+
+    def __init__(self, name: str, retry_after: float) -> None:
+        self.retry_after = retry_after
+        super().__init__(
+            f"{name!r} is failing, so calls will be rejected for another "
+            f"{retry_after:.2f}s"
+        )
+
+
+class LoadShed(XsyncError):
+    """Exception thrown when a call to a hybrid callable is shed because
+    it waited too long for its limiter.
+    """
+
+    def __init__(self, func: t.Callable[..., t.Any], waited: float) -> None:
+        super().__init__(
+            f"Call to {func.__qualname__!r} was shed after waiting {waited:.2f}s for "
+            "its limiter"
+        )
+
+
+class DependencyError(XsyncError):
+    """Exception thrown when the components in a `Container` have
+    missing, duplicate, or cyclic dependencies.
+    """
+
+
 class NotHybridCallable(XsyncError):
     """Exception thrown when an attempt to map an async implementation
     to a non-hybrid callable is made.
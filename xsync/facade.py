@@ -0,0 +1,311 @@
+# Copyright (c) 2022-present, Ethan Henderson
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+import typing as t
+from functools import wraps
+
+from xsync import backends, errors, timeouts
+from xsync.utils import get_logger, is_coroutine_function, maybe_await
+
+if t.TYPE_CHECKING:
+    from concurrent.futures import Future
+
+    from xsync.types import FuncT
+
+_CO_ASYNC_GENERATOR = 0x200
+
+_log = get_logger(__name__)
+_loops: list[_BackgroundLoop] = []
+_loops_lock = threading.Lock()
+
+
+class _BackgroundLoop:
+    def __init__(self, index: int) -> None:
+        self.loop = backends.new_event_loop()
+        self.thread = threading.Thread(
+            target=self.loop.run_forever, name=f"xsync-loop-{index}", daemon=True
+        )
+        self.thread.start()
+
+    def _check_thread(self) -> None:
+        if threading.current_thread() is self.thread:
+            raise RuntimeError(
+                "sync facades can't be used from their own background loop"
+            )
+
+    def submit(self, coro: t.Coroutine[t.Any, t.Any, t.Any]) -> Future[t.Any]:
+        import asyncio
+
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def call(
+        self, func: FuncT, args: tuple[t.Any, ...], kwargs: dict[str, t.Any]
+    ) -> t.Any:
+        from concurrent.futures import TimeoutError
+
+        self._check_thread()
+        at = timeouts.deadline_for(None)
+        if at is None:
+            return self.submit(func(*args, **kwargs)).result()
+
+        budget = at - time.monotonic()
+        if budget <= 0:
+            raise errors.DeadlineExceeded(func)
+
+        fut = self.submit(_bounded(func(*args, **kwargs), at))
+        try:
+            return fut.result(budget)
+        except TimeoutError:
+            if not fut.done():
+                fut.cancel()
+                raise errors.DeadlineExceeded(func) from None
+            raise
+
+    def iterate(
+        self,
+        func: FuncT,
+        args: tuple[t.Any, ...],
+        kwargs: dict[str, t.Any],
+        prefetch: int,
+    ) -> t.Iterator[t.Any]:
+        import asyncio
+        import queue
+
+        self._check_thread()
+        items: queue.SimpleQueue[tuple[bool, t.Any]] = queue.SimpleQueue()
+        slots: list[asyncio.Semaphore] = []
+
+        async def produce() -> None:
+            # Up to `prefetch` items are fetched ahead of the consumer.
+            # The consumer frees a slot for each item it takes.
+            slots.append(asyncio.Semaphore(prefetch))
+            agen = func(*args, **kwargs)
+
+            try:
+                while True:
+                    await slots[0].acquire()
+                    try:
+                        item = await agen.__anext__()
+                    except StopAsyncIteration:
+                        items.put((False, None))
+                        return
+                    items.put((True, item))
+            except BaseException as exc:
+                items.put((False, exc))
+                if not isinstance(exc, Exception):
+                    raise
+            finally:
+                await agen.aclose()
+
+        fut = self.submit(produce())
+
+        try:
+            while True:
+                ok, value = items.get()
+                if not ok:
+                    if value is not None:
+                        raise value
+                    return
+
+                self.loop.call_soon_threadsafe(slots[0].release)
+                yield value
+        finally:
+            # Closing the iterator early cancels the producer, which
+            # closes the async generator on the loop.
+            fut.cancel()
+
+    def stop(self) -> None:
+        import asyncio
+
+        if self.loop.is_closed():
+            return
+
+        try:
+            # Lets `loop_local` resources and other async generators
+            # clean up before the loop goes away.
+            asyncio.run_coroutine_threadsafe(
+                self.loop.shutdown_asyncgens(), self.loop
+            ).result(5)
+        except Exception as exc:
+            _log.warning(f"Failed to shut down {self.thread.name!r} cleanly: {exc}")
+
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+        if not self.thread.is_alive():
+            self.loop.close()
+
+
+async def _bounded(coro: t.Coroutine[t.Any, t.Any, t.Any], at: float) -> t.Any:
+    # Makes the caller's deadline visible to hybrid calls made by the
+    # coroutine. The caller enforces it by cancelling the coroutine.
+    timeouts._deadline.set(at)
+    timeouts._enforced.set(at)
+    return await coro
+
+
+async def _create(
+    cls: type[t.Any], args: tuple[t.Any, ...], kwargs: dict[str, t.Any]
+) -> t.Any:
+    # Objects using `AsyncInitMixin` are initialised asynchronously.
+    return await maybe_await(cls(*args, **kwargs))
+
+
+def _get_loop(index: int) -> _BackgroundLoop:
+    with _loops_lock:
+        if not _loops:
+            import atexit
+
+            atexit.register(_stop_loops)
+
+        while len(_loops) <= index:
+            _loops.append(_BackgroundLoop(len(_loops)))
+
+        return _loops[index]
+
+
+def _stop_loops() -> None:
+    with _loops_lock:
+        loops = _loops[:]
+        _loops.clear()
+
+    for loop in loops:
+        loop.stop()
+
+
+def _method(name: str, func: FuncT) -> FuncT:
+    @wraps(func)
+    def method(self: t.Any, *args: t.Any, **kwargs: t.Any) -> t.Any:
+        return self._xsync_loop.call(getattr(self._xsync_obj, name), args, kwargs)
+
+    return t.cast("FuncT", method)
+
+
+def _iter_method(name: str, func: FuncT, prefetch: int) -> FuncT:
+    @wraps(func)
+    def method(self: t.Any, *args: t.Any, **kwargs: t.Any) -> t.Iterator[t.Any]:
+        return self._xsync_loop.iterate(  # type: ignore
+            getattr(self._xsync_obj, name), args, kwargs, prefetch
+        )
+
+    return t.cast("FuncT", method)
+
+
+def _facade_name(name: str) -> str:
+    if name.startswith("Async") and len(name) > 5:
+        return f"Sync{name[5:]}"
+    return f"Sync{name}"
+
+
+def syncify(cls: type[t.Any], *, loops: int = 1, prefetch: int = 16) -> type[t.Any]:
+    """Create a sync facade for an async class.
+
+    Each coroutine method of `cls` becomes a sync method which runs it
+    on a background event loop, and each async generator method becomes
+    a sync iterator which fetches up to `prefetch` items ahead. Async
+    context managers can be used with `with`.
+
+    Facade instances create their async object on the background loop
+    and stay on that loop, so connections bound to it are reused. Up to
+    `loops` loops are used, with instances spread evenly between them.
+    Other attributes are looked up on the async object directly.
+    """
+
+    if loops < 1:
+        raise ValueError("loops must be at least 1")
+    if prefetch < 1:
+        raise ValueError("prefetch must be at least 1")
+
+    members: dict[str, t.Any] = {}
+    for klass in reversed(cls.__mro__[:-1]):
+        members.update(vars(klass))
+
+    namespace: dict[str, t.Any] = {}
+    for name, value in members.items():
+        if name.startswith("_") and name not in ("__aenter__", "__aexit__"):
+            continue
+
+        func = getattr(value, "__func__", value)
+        if is_coroutine_function(func):
+            namespace[name] = _method(name, func)
+        elif getattr(getattr(func, "__code__", None), "co_flags", 0) & (
+            _CO_ASYNC_GENERATOR
+        ):
+            namespace[name] = _iter_method(name, func, prefetch)
+
+    if "aclose" in namespace and "close" not in members:
+        namespace["close"] = namespace["aclose"]
+
+    if "__aenter__" in namespace:
+        aenter = namespace.pop("__aenter__")
+
+        def __enter__(self: t.Any) -> t.Any:
+            value = aenter(self)
+            return self if value is self._xsync_obj else value
+
+        namespace["__enter__"] = __enter__
+
+    if "__aexit__" in namespace:
+        namespace["__exit__"] = namespace.pop("__aexit__")
+
+    facade_name = _facade_name(cls.__name__)
+    outer = cls.__qualname__.rpartition(".")[0]
+    counter = itertools.count()
+
+    def __init__(self: t.Any, *args: t.Any, **kwargs: t.Any) -> None:
+        loop = _get_loop(next(counter) % loops)
+        self._xsync_loop = loop
+        self._xsync_obj = loop.call(_create, (cls, args, kwargs), {})
+
+    def __getattr__(self: t.Any, attr: str) -> t.Any:
+        if attr.startswith("_xsync_"):
+            raise AttributeError(attr)
+        return getattr(self._xsync_obj, attr)
+
+    def __repr__(self: t.Any) -> str:
+        return f"<{type(self).__qualname__} for {self._xsync_obj!r}>"
+
+    namespace.update(
+        {
+            "__init__": __init__,
+            "__getattr__": __getattr__,
+            "__repr__": __repr__,
+            "__slots__": ("_xsync_loop", "_xsync_obj"),
+            "__module__": cls.__module__,
+            "__qualname__": f"{outer}.{facade_name}" if outer else facade_name,
+            "__doc__": cls.__doc__,
+            "__xsync_async__": cls,
+        }
+    )
+
+    _log.debug(f"Created a sync facade for {cls.__qualname__!r}")
+    return type(facade_name, (), namespace)
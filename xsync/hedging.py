@@ -0,0 +1,102 @@
+# Copyright (c) 2022-present, Ethan Henderson
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from __future__ import annotations
+
+import time
+import typing as t
+
+from xsync import backends
+
+if t.TYPE_CHECKING:
+    from xsync.stats import HybridStats
+    from xsync.types import CallT, FuncT
+
+# Adaptive delays aren't used until enough latencies have been seen for
+# the percentile to mean something.
+_MIN_SAMPLES = 20
+
+
+def parse_delay(hedge_after: float | str) -> tuple[float | None, float | None]:
+    # Returns a fixed delay or a percentile to derive one from.
+    if isinstance(hedge_after, str):
+        if not hedge_after.startswith("p"):
+            raise ValueError(f"invalid hedge delay {hedge_after!r}")
+        pct = float(hedge_after[1:])
+        if not 0 < pct < 100:
+            raise ValueError(f"invalid hedge percentile {hedge_after!r}")
+        return None, pct
+
+    if hedge_after < 0:
+        raise ValueError("hedge delay cannot be negative")
+    return float(hedge_after), None
+
+
+def hedged(
+    call: CallT, stats: HybridStats, hedge_after: float | str, max_hedges: int
+) -> CallT:
+    if max_hedges < 1:
+        raise ValueError("max_hedges must be at least 1")
+
+    fixed, pct = parse_delay(hedge_after)
+
+    def hedging(
+        impl: FuncT, args: tuple[t.Any, ...], kwargs: dict[str, t.Any]
+    ) -> t.Any:
+        if fixed is not None:
+            delay: float | None = fixed
+        else:
+            delay = None
+            if len(stats.latencies) >= _MIN_SAMPLES:
+                delay = stats.percentile(t.cast(float, pct))
+
+        return _run(call, impl, args, kwargs, stats, delay, max_hedges)
+
+    return hedging
+
+
+async def _run(
+    call: CallT,
+    impl: FuncT,
+    args: tuple[t.Any, ...],
+    kwargs: dict[str, t.Any],
+    stats: HybridStats,
+    delay: float | None,
+    max_hedges: int,
+) -> t.Any:
+    start = time.monotonic()
+    winner, result, calls = await backends.current().hedge(
+        lambda: call(impl, args, kwargs), delay, max_hedges
+    )
+    stats.record_hedging(calls - 1, bool(winner))
+
+    if winner is None:
+        raise result
+
+    stats.record_latency(time.monotonic() - start)
+    return result
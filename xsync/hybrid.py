@@ -28,54 +28,247 @@
 
 from __future__ import annotations
 
-import inspect
-import logging
+import sys
+import threading
 import typing as t
-from functools import wraps
+from functools import update_wrapper, wraps
 
-from xsync import errors
-from xsync.utils import get_qualname
+from xsync import diagnostics, errors, timeouts
+from xsync.breakers import CircuitBreaker, guarded_async, guarded_sync
+from xsync.context import (
+    HybridContextManager,
+    hybrid_context_class,
+    is_context_factory,
+)
+from xsync.eager import awaited_directly, eager_start, eager_task
+from xsync.hedging import hedged
+from xsync.limits import Limiter, limited_async, limited_sync
+from xsync.properties import hybrid_cached_property
+from xsync.stats import HybridStats
+from xsync.utils import (
+    get_logger,
+    get_qualname,
+    is_awaited,
+    is_coroutine_function,
+)
 
 if t.TYPE_CHECKING:
-    from xsync.types import DecoT, FuncT, MappingT
+    from xsync.types import CallT, ClassT, DecoT, FuncT, MappingT
 
-_log = logging.getLogger(__name__)
+_log = get_logger(__name__)
 _mapping: MappingT = {}
+_lock = threading.Lock()
 
 
-def as_hybrid() -> DecoT:
+def _register(entries: MappingT) -> None:
+    global _mapping
+
+    # The mapping is copied on write so lookups never need the lock and
+    # always see a complete mapping, even without a GIL.
+    with _lock:
+        _mapping = {**_mapping, **entries}
+
+
+def as_hybrid(
+    *,
+    eager: bool = False,
+    timeout: float | None = None,
+    hedge_after: float | str | None = None,
+    max_hedges: int = 1,
+    limit: int | Limiter | None = None,
+    rate: float | None = None,
+    breaker: CircuitBreaker | None = None,
+) -> DecoT:
+    options: dict[str, t.Any] = {
+        "eager": eager,
+        "timeout": timeout,
+        "hedge_after": hedge_after,
+        "max_hedges": max_hedges,
+        "limit": limit,
+        "rate": rate,
+        "breaker": breaker,
+    }
+
     def decorator(func: FuncT) -> FuncT:
         qualname = get_qualname(func)
-        _mapping[qualname] = None
+        _register({qualname: None})
         _log.info(f"Registered {qualname!r} as hybrid callable")
+        wrapper = _wrap(func, qualname, **options)
 
-        @wraps(func)
-        def wrapper(*args: t.Any, **kwargs: t.Any) -> t.Any:
-            ctx = inspect.stack()[1].code_context
+        # Kept so `hybrid_class` can rewrap the function with the same
+        # options.
+        setattr(wrapper, "__xsync_options__", options)
+        return wrapper
+
+    return decorator
 
-            if not ctx or "await" not in ctx[0]:
-                _log.debug(f"Selected {qualname!r} to run (sync)")
-                return func(*args, **kwargs)
 
-            coro = _mapping[qualname]
-            if not coro:
-                raise errors.NoAsyncImplementation(func)
-            _log.debug(f"Selected {coro.__qualname__!r} to run (async)")
-            return coro(*args, **kwargs)
+def _call(impl: FuncT, args: tuple[t.Any, ...], kwargs: dict[str, t.Any]) -> t.Any:
+    return impl(*args, **kwargs)
 
-        return wrapper
 
-    return decorator
+def _call_eager(
+    impl: FuncT, args: tuple[t.Any, ...], kwargs: dict[str, t.Any]
+) -> t.Any:
+    return eager_start(impl(*args, **kwargs))
+
+
+def _call_eager_task(
+    impl: FuncT, args: tuple[t.Any, ...], kwargs: dict[str, t.Any]
+) -> t.Any:
+    return eager_task(impl(*args, **kwargs))
+
+
+def _wrap(
+    func: FuncT,
+    qualname: str,
+    coro: FuncT | None = None,
+    *,
+    eager: bool = False,
+    timeout: float | None = None,
+    hedge_after: float | str | None = None,
+    max_hedges: int = 1,
+    limit: int | Limiter | None = None,
+    rate: float | None = None,
+    breaker: CircuitBreaker | None = None,
+) -> FuncT:
+    # The async implementation is bound to the wrapper itself, so it
+    # doesn't need to be looked up by name on each call, and identically
+    # named hybrids (such as closures) don't overwrite each other. The
+    # mapping is only used as a fallback.
+    binding: list[FuncT | None] = [coro]
+    stats = HybridStats(qualname)
+
+    # Both paths share the same limiter, so sync and async callers count
+    # towards the same limits.
+    limiter: Limiter | None = None
+    if isinstance(limit, Limiter):
+        if rate is not None:
+            raise ValueError("rate cannot be given with a Limiter; set it there")
+        limiter = limit
+    elif limit is not None or rate is not None:
+        limiter = Limiter(limit, rate)
+    stats.limiter = limiter
+
+    if is_context_factory(func):
+        # Only the limiter applies to context managers, which hold their
+        # permit until they're exited.
+        if eager or timeout is not None or hedge_after is not None or breaker:
+            raise ValueError("context managers only support limit and rate")
+
+        cm_wrapper = _context_wrapper(func, qualname, binding, limiter)
+        setattr(cm_wrapper, "__xsync_binding__", binding)
+        setattr(cm_wrapper, "__xsync_stats__", stats)
+        return cm_wrapper
+
+    sync_msg = f"Selected {qualname!r} to run (sync)"
+
+    shed_after = breaker.shed_after if breaker is not None else None
+    if limiter is None and shed_after is not None:
+        raise ValueError("shedding load requires a limit or rate")
+
+    # Each option wraps the sync function and the async call in turn, so
+    # the work done per call is decided here rather than on each call.
+    def layer(call: CallT) -> CallT:
+        if limiter is not None:
+            call = limited_async(call, limiter, shed_after)
+        if hedge_after is not None:
+            call = hedged(call, stats, hedge_after, max_hedges)
+        call = timeouts.bound_async(call, timeout)
+        if breaker is not None:
+            call = guarded_async(call, breaker, qualname)
+        return call
+
+    run: FuncT = func
+    if limiter is not None:
+        run = limited_sync(run, limiter, shed_after)
+    run = timeouts.bound_sync(run, timeout)
+    if breaker is not None:
+        # The breaker goes outside everything else, so open circuits
+        # fail before queueing, and timeouts count as failures.
+        stats.breaker = breaker
+        run = guarded_sync(run, breaker, qualname)
+
+    call = layer(_call_eager_task if eager else _call)
+
+    # Before Python 3.12, coroutines can only be started eagerly in the
+    # calling task. That's only done for calls it awaits directly, and
+    # without hedges or timeouts, which run the call in a task of its
+    # own.
+    eager_call: CallT | None = None
+    if eager and sys.version_info < (3, 12) and hedge_after is None and timeout is None:
+        eager_call = layer(_call_eager)
+
+    @wraps(func)
+    def wrapper(*args: t.Any, **kwargs: t.Any) -> t.Any:
+        frame = sys._getframe(1)
+
+        if not is_awaited(frame):
+            _log.debug(sync_msg)
+            if diagnostics.enabled:
+                return diagnostics.run_checked(
+                    run, args, kwargs, frame, qualname, stats
+                )
+            return run(*args, **kwargs)
+
+        impl = binding[0] or _mapping[qualname]
+        if not impl:
+            raise errors.NoAsyncImplementation(func)
+        _log.debug(f"Selected {impl.__qualname__!r} to run (async)")
+        if eager_call is not None and not timeouts.active and awaited_directly(frame):
+            return eager_call(impl, args, kwargs)
+        return call(impl, args, kwargs)
+
+    setattr(wrapper, "__xsync_binding__", binding)
+    setattr(wrapper, "__xsync_stats__", stats)
+    return wrapper
+
+
+def _context_wrapper(
+    func: FuncT,
+    qualname: str,
+    binding: list[FuncT | None],
+    limiter: Limiter | None = None,
+) -> FuncT:
+    def get_coro() -> FuncT:
+        impl = binding[0] or _mapping[qualname]
+        if not impl:
+            raise errors.NoAsyncImplementation(func)
+        _log.debug(f"Selected {impl.__qualname__!r} to enter (async)")
+        return impl
+
+    # Context managers are entered with `with` or `async with` rather
+    # than awaited, so the choice is deferred until the object is used.
+    # Classes are subclassed rather than wrapped, so they can still be
+    # used as classes.
+    if isinstance(func, type):
+        return t.cast("FuncT", hybrid_context_class(func, get_coro, limiter))
+
+    def wrapper(*args: t.Any, **kwargs: t.Any) -> HybridContextManager:
+        return HybridContextManager(func, get_coro, args, kwargs, limiter)
+
+    return update_wrapper(wrapper, func)
 
 
 def set_async_impl(func: FuncT) -> DecoT:
     def decorator(coro: FuncT) -> FuncT:
-        qualname = get_qualname(func, coro)
+        if isinstance(func, hybrid_cached_property):
+            qualname = func.func.__qualname__
+            func.set_async_impl(coro)
+        else:
+            qualname = get_qualname(func, coro)
 
-        if qualname not in _mapping:
-            raise errors.NotHybridCallable(func, coro)
+            if qualname not in _mapping:
+                raise errors.NotHybridCallable(func, coro)
+
+            _register({qualname: coro})
+
+            binding = getattr(
+                getattr(func, "__func__", func), "__xsync_binding__", None
+            )
+            if binding is not None:
+                binding[0] = coro
 
-        _mapping[qualname] = coro
         _log.info(
             f"Registered {coro.__qualname__!r} as async implementation of {qualname!r}"
         )
@@ -87,3 +280,65 @@ def set_async_impl(func: FuncT) -> DecoT:
         return wrapper
 
     return decorator
+
+
+def hybrid_class(
+    prefix: str = "async_", suffix: str = ""
+) -> t.Callable[[ClassT], ClassT]:
+    if not (prefix or suffix):
+        raise ValueError("a prefix or suffix is required to pair methods")
+
+    def decorator(cls: ClassT) -> ClassT:
+        namespace = vars(cls)
+        entries: MappingT = {}
+
+        for name, attr in list(namespace.items()):
+            if name == prefix + suffix or not (
+                name.startswith(prefix) and name.endswith(suffix)
+            ):
+                continue
+
+            coro = getattr(attr, "__func__", attr)
+            if not is_coroutine_function(coro):
+                continue
+
+            sync_name = name[len(prefix) : len(name) - len(suffix)]
+            if sync_name not in namespace:
+                raise errors.NoSyncImplementation(coro, sync_name)
+
+            sync_attr = namespace[sync_name]
+            func = getattr(sync_attr, "__func__", sync_attr)
+            qualname = get_qualname(func, coro)
+
+            # Methods already wrapped with `as_hybrid` are rewrapped
+            # from the original function, keeping their options.
+            options: dict[str, t.Any] = {}
+            if qualname in _mapping:
+                options = getattr(func, "__xsync_options__", options)
+                func = getattr(func, "__wrapped__", func)
+
+            entries[qualname] = coro
+            wrapper: t.Any = _wrap(func, qualname, coro, **options)
+
+            if isinstance(sync_attr, (classmethod, staticmethod)):
+                wrapper = type(sync_attr)(wrapper)
+
+            setattr(cls, sync_name, wrapper)
+            _log.info(
+                f"Registered {coro.__qualname__!r} as async implementation of "
+                f"{qualname!r}"
+            )
+
+        _register(entries)
+
+        # Fail now rather than on the first awaited call.
+        for attr in namespace.values():
+            func = getattr(attr, "__func__", attr)
+            name = getattr(func, "__qualname__", "")
+
+            if name in _mapping and not _mapping[name]:
+                raise errors.NoAsyncImplementation(func)
+
+        return cls
+
+    return decorator
@@ -0,0 +1,348 @@
+# Copyright (c) 2022-present, Ethan Henderson
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from __future__ import annotations
+
+import threading
+import time
+import typing as t
+from collections import deque
+from functools import wraps
+
+from xsync import backends, errors
+
+if t.TYPE_CHECKING:
+    from types import TracebackType
+
+    from xsync.types import CallT, FuncT
+
+
+class _Waiter:
+    __slots__ = ("enqueued", "granted", "event", "waker")
+
+    def __init__(
+        self,
+        event: threading.Event | None = None,
+        waker: backends.Waker | None = None,
+    ) -> None:
+        self.enqueued = time.monotonic()
+        self.granted = False
+        self.event = event
+        self.waker = waker
+
+    def wake(self) -> None:
+        if self.event is not None:
+            self.event.set()
+        elif self.waker is not None:
+            self.waker.wake()
+
+    def reset(self) -> None:
+        # Called once the waiter has checked whether it can stop, so
+        # earlier wake-ups don't stop it waiting again.
+        if self.event is not None:
+            self.event.clear()
+        elif self.waker is not None:
+            self.waker.reset()
+
+
+class Limiter:
+    """A concurrency and rate limiter which can be shared by threads and
+    tasks.
+
+    Threads block and tasks suspend while waiting, and permits are given
+    out in the order they were asked for, whichever kind of caller
+    asked.
+    Limiters can be used with both `with` and `async with`.
+
+    Args:
+        limit: The maximum number of permits which can be held at once.
+        rate: The maximum number of permits given out per second.
+        burst: The number of permits which can be given out at once
+            before the rate applies. Defaults to one second's worth.
+    """
+
+    def __init__(
+        self,
+        limit: int | None = None,
+        rate: float | None = None,
+        burst: int | None = None,
+    ) -> None:
+        if limit is not None and limit < 1:
+            raise ValueError("limit must be at least 1")
+        if rate is not None and rate <= 0:
+            raise ValueError("rate must be positive")
+
+        self.limit = limit
+        self.rate = rate
+        self.burst = burst or (max(1, int(rate)) if rate else 0)
+        self.in_use = 0
+        self.acquisitions = 0
+        self.waits = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._waiters: deque[_Waiter] = deque()
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"<Limiter limit={self.limit} rate={self.rate} {self.as_dict()}>"
+
+    def __enter__(self) -> Limiter:
+        self.acquire()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.release()
+
+    async def __aenter__(self) -> Limiter:
+        await self.acquire_async()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.release()
+
+    @property
+    def waiting(self) -> int:
+        """The number of callers currently waiting for a permit."""
+
+        return len(self._waiters)
+
+    @property
+    def mean_wait(self) -> float:
+        """The mean time, in seconds, callers which had to wait spent
+        waiting.
+        """
+
+        return self.total_wait / self.waits if self.waits else 0.0
+
+    def as_dict(self) -> dict[str, t.Any]:
+        return {
+            "in_use": self.in_use,
+            "waiting": self.waiting,
+            "acquisitions": self.acquisitions,
+            "waits": self.waits,
+            "mean_wait": self.mean_wait,
+            "max_wait": self.max_wait,
+        }
+
+    def acquire(self, timeout: float | None = None) -> bool:
+        """Block until a permit is available, and take it.
+
+        Returns `False` if the timeout expired first.
+        """
+
+        with self._lock:
+            if self._take_now():
+                return True
+
+            waiter = _Waiter(event=threading.Event())
+            self._waiters.append(waiter)
+
+        assert waiter.event is not None
+        end = None if timeout is None else waiter.enqueued + timeout
+
+        while True:
+            with self._lock:
+                delay = self._poll(waiter, end)
+                if delay is not None and delay <= 0:
+                    return waiter.granted
+
+            waiter.event.wait(delay)
+
+    async def acquire_async(self, timeout: float | None = None) -> bool:
+        """Wait until a permit is available without blocking the event
+        loop, and take it.
+
+        Returns `False` if the timeout expired first.
+        """
+
+        with self._lock:
+            if self._take_now():
+                return True
+
+            waker = backends.current().waker()
+            waiter = _Waiter(waker=waker)
+            self._waiters.append(waiter)
+
+        end = None if timeout is None else waiter.enqueued + timeout
+
+        try:
+            while True:
+                with self._lock:
+                    delay = self._poll(waiter, end)
+                    if delay is not None and delay <= 0:
+                        return waiter.granted
+
+                await waker.wait(delay)
+        except BaseException:
+            with self._lock:
+                if waiter.granted:
+                    self._release()
+                else:
+                    self._remove(waiter)
+            raise
+
+    def release(self) -> None:
+        """Give a permit back."""
+
+        with self._lock:
+            self._release()
+
+    def _refill(self, now: float) -> None:
+        if self.rate:
+            self._tokens = min(
+                float(self.burst), self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+
+    def _available(self) -> bool:
+        if self.limit is not None and self.in_use >= self.limit:
+            return False
+        return not self.rate or self._tokens >= 1
+
+    def _take(self) -> None:
+        self.in_use += 1
+        self.acquisitions += 1
+        if self.rate:
+            self._tokens -= 1
+
+    def _take_now(self) -> bool:
+        # Callers can't jump the queue, even if a permit is free.
+        self._refill(time.monotonic())
+        if self._waiters or not self._available():
+            return False
+
+        self._take()
+        return True
+
+    def _grant(self) -> None:
+        now = time.monotonic()
+        self._refill(now)
+
+        granted = False
+        while self._waiters and self._available():
+            waiter = self._waiters.popleft()
+            waiter.granted = granted = True
+            self._take()
+
+            wait = now - waiter.enqueued
+            self.waits += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            waiter.wake()
+
+        if granted and self.rate and self._waiters:
+            # The new front of the queue may be waiting without a
+            # timeout, so it needs waking to wait for the next token.
+            self._waiters[0].wake()
+
+    def _remove(self, waiter: _Waiter) -> None:
+        front = self._waiters[0] is waiter
+        self._waiters.remove(waiter)
+        if front and self._waiters:
+            self._waiters[0].wake()
+
+    def _release(self) -> None:
+        self.in_use -= 1
+        self._grant()
+
+    def _poll(self, waiter: _Waiter, end: float | None) -> float | None:
+        # Returns how long the waiter should wait before checking again,
+        # with zero meaning it should stop waiting.
+        self._grant()
+        if waiter.granted:
+            return 0
+
+        now = time.monotonic()
+        if end is not None and now >= end:
+            self._remove(waiter)
+            return 0
+
+        delay = None if end is None else end - now
+        if self.rate and self._waiters[0] is waiter and self._tokens < 1:
+            # Nothing will wake the waiter at the front of the queue
+            # when more tokens become available, so it has to check
+            # itself.
+            refill = (1 - self._tokens) / self.rate
+            delay = refill if delay is None else min(delay, refill)
+
+        waiter.reset()
+        return delay
+
+
+def limited_sync(
+    func: FuncT, limiter: Limiter, shed_after: float | None = None
+) -> FuncT:
+    if shed_after is None:
+
+        @wraps(func)
+        def limited(*args: t.Any, **kwargs: t.Any) -> t.Any:
+            with limiter:
+                return func(*args, **kwargs)
+
+        return limited
+
+    @wraps(func)
+    def shedding(*args: t.Any, **kwargs: t.Any) -> t.Any:
+        if not limiter.acquire(shed_after):
+            raise errors.LoadShed(func, shed_after)
+
+        try:
+            return func(*args, **kwargs)
+        finally:
+            limiter.release()
+
+    return shedding
+
+
+def limited_async(
+    call: CallT, limiter: Limiter, shed_after: float | None = None
+) -> CallT:
+    async def limited(
+        impl: FuncT, args: tuple[t.Any, ...], kwargs: dict[str, t.Any]
+    ) -> t.Any:
+        if not await limiter.acquire_async(shed_after):
+            raise errors.LoadShed(impl, t.cast(float, shed_after))
+
+        try:
+            return await call(impl, args, kwargs)
+        finally:
+            limiter.release()
+
+    return limited
@@ -0,0 +1,215 @@
+# Copyright (c) 2022-present, Ethan Henderson
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from __future__ import annotations
+
+import inspect
+import sys
+import threading
+import typing as t
+import weakref
+
+from xsync.utils import get_logger, maybe_await
+
+if t.TYPE_CHECKING:
+    import asyncio
+
+T = t.TypeVar("T")
+
+_log = get_logger(__name__)
+
+
+class loop_local(t.Generic[T]):
+    """Storage for a resource which is bound to the event loop that
+    created it, such as a HTTP session or a connection pool.
+
+    One resource is created lazily for each running event loop using
+    `factory` (which can be a sync or async callable), and is closed
+    when that loop is shut down. Resources are closed using `close` if
+    given, or otherwise their own `aclose()` or `close()` method.
+    """
+
+    def __init__(
+        self,
+        factory: t.Callable[[], T | t.Awaitable[T]],
+        *,
+        close: t.Callable[[T], t.Any] | None = None,
+    ) -> None:
+        self.factory = factory
+        self.close = close
+        self._resources: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop,
+            tuple[T, t.AsyncGenerator[None, None], weakref.finalize[..., t.Any]],
+        ] = weakref.WeakKeyDictionary()
+        self._pending: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, asyncio.Task[T]
+        ] = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    async def get(self) -> T:
+        """Return the resource for the running event loop, creating it
+        if needed.
+        """
+
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+
+        with self._lock:
+            entry = self._resources.get(loop)
+            if entry is not None:
+                return entry[0]
+
+            pending = self._pending.get(loop)
+            if pending is None:
+                pending = loop.create_task(self._create())
+                self._pending[loop] = pending
+
+        # The resource is created in its own task, and is shielded so a
+        # cancelled caller (even the one which started it) doesn't
+        # cancel it for everyone else.
+        return await asyncio.shield(pending)
+
+    async def aclose(self) -> None:
+        """Close the resource for the running event loop, if there is
+        one.
+        """
+
+        import asyncio
+
+        with self._lock:
+            entry = self._resources.pop(asyncio.get_running_loop(), None)
+
+        if entry is not None:
+            entry[2].detach()
+            await entry[1].aclose()
+
+    async def _create(self) -> T:
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+
+        try:
+            resource: T = await maybe_await(self.factory())
+        except BaseException:
+            with self._lock:
+                del self._pending[loop]
+            raise
+
+        # Event loops close any async generators they're tracking when
+        # they shut down, so one is used as a shutdown hook. It has to
+        # be started here so the loop picks it up.
+        closer = self._closer(resource)
+        await _start_closer(closer)
+
+        # Loops which are discarded without being shut down never close
+        # their async generators, so the resource is closed (if it can
+        # be) when the loop is garbage collected instead.
+        finalizer = weakref.finalize(loop, _close_abandoned, resource, self.close)
+
+        with self._lock:
+            del self._pending[loop]
+            self._resources[loop] = (resource, closer, finalizer)
+
+        _log.debug(f"Created {type(resource).__name__!r} for loop {id(loop):#x}")
+        return resource
+
+    async def _closer(self, resource: T) -> t.AsyncGenerator[None, None]:
+        import asyncio
+
+        try:
+            yield
+        finally:
+            # The loop isn't stored in the generator's frame, as that
+            # would keep it alive for as long as the resource is stored.
+            loop = asyncio.get_running_loop()
+
+            with self._lock:
+                entry = self._resources.get(loop)
+                if entry is not None and entry[0] is resource:
+                    del self._resources[loop]
+                    entry[2].detach()
+
+            _log.debug(f"Closing {type(resource).__name__!r} for loop {id(loop):#x}")
+            await self._close(resource)
+
+    async def _close(self, resource: T) -> None:
+        if self.close is not None:
+            await maybe_await(self.close(resource))
+        elif hasattr(resource, "aclose"):
+            await resource.aclose()
+        elif hasattr(resource, "close"):
+            await maybe_await(resource.close())
+
+
+def _start_closer(closer: t.AsyncGenerator[None, None]) -> t.Awaitable[None]:
+    # Started async generators keep a strong reference to the loop's
+    # finalizer hook, and so to the loop itself. The hook is swapped for
+    # one which only references the loop weakly while the generator is
+    # started.
+    firstiter, finalizer = sys.get_asyncgen_hooks()
+    owner = getattr(finalizer, "__self__", None)
+    if finalizer is None or owner is None:
+        return closer.__anext__()
+
+    ref = weakref.ref(owner)
+    name = finalizer.__name__
+
+    def finalize(agen: t.AsyncGenerator[t.Any, t.Any]) -> None:
+        loop = ref()
+        if loop is not None:
+            getattr(loop, name)(agen)
+
+    sys.set_asyncgen_hooks(firstiter, finalize)
+    try:
+        # The hooks are picked up when the first step is created, rather
+        # than when it's awaited.
+        return closer.__anext__()
+    finally:
+        sys.set_asyncgen_hooks(firstiter, finalizer)
+
+
+def _close_abandoned(resource: t.Any, close: t.Callable[[t.Any], t.Any] | None) -> None:
+    name = type(resource).__name__
+    msg = f"Could not close {name!r} as its event loop was not shut down"
+
+    if close is not None:
+        result = close(resource)
+    elif hasattr(resource, "close"):
+        result = resource.close()
+    else:
+        _log.warning(msg)
+        return
+
+    if inspect.isawaitable(result):
+        # There's no loop left to close it asynchronously.
+        if inspect.iscoroutine(result):
+            result.close()
+        _log.warning(msg)
+    else:
+        _log.debug(f"Closed {name!r} after its event loop was discarded")
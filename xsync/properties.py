@@ -0,0 +1,149 @@
+# Copyright (c) 2022-present, Ethan Henderson
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from __future__ import annotations
+
+import sys
+import typing as t
+
+from xsync import errors
+from xsync.utils import Ready, get_logger, is_awaited
+
+if t.TYPE_CHECKING:
+    import asyncio
+
+    from xsync.types import FuncT
+
+_log = get_logger(__name__)
+
+
+class hybrid_cached_property:
+    """A cached property which can be accessed both normally and by
+    awaiting it.
+
+    The value is computed once per instance by whichever implementation
+    is used first, and stored in the instance's `__dict__`. Concurrent
+    awaiters of an uncached value share a single call to the async
+    implementation. Delete the attribute to invalidate the value.
+    """
+
+    def __init__(self, func: FuncT) -> None:
+        self.func = func
+        self.coro: FuncT | None = None
+        self.attrname: str | None = None
+        self.__doc__ = func.__doc__
+        self._pending: dict[tuple[int, int], asyncio.Future[t.Any]] = {}
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        if self.attrname is None:
+            self.attrname = name
+        elif name != self.attrname:
+            raise TypeError(
+                "Cannot assign the same hybrid_cached_property to two different "
+                f"names ({self.attrname!r} and {name!r})"
+            )
+
+    def __get__(self, instance: t.Any, owner: type | None = None) -> t.Any:
+        if instance is None:
+            return self
+
+        cache = self._get_cache(instance)
+        awaited = is_awaited(sys._getframe(1))
+
+        try:
+            value = cache[self.attrname]
+        except KeyError:
+            pass
+        else:
+            return Ready(value) if awaited else value
+
+        if not awaited:
+            _log.debug(f"Computing {self.func.__qualname__!r} (sync)")
+            cache[self.attrname] = value = self.func(instance)
+            return value
+
+        return self._load(instance, cache)
+
+    def __set__(self, instance: t.Any, value: t.Any) -> None:
+        self._get_cache(instance)[self.attrname] = value
+
+    def __delete__(self, instance: t.Any) -> None:
+        self._get_cache(instance).pop(self.attrname, None)
+        for key in list(self._pending):
+            if key[0] == id(instance):
+                self._pending.pop(key, None)
+
+    def set_async_impl(self, coro: FuncT) -> None:
+        self.coro = coro
+
+    def _get_cache(self, instance: t.Any) -> dict[str | None, t.Any]:
+        try:
+            return t.cast("dict[str | None, t.Any]", instance.__dict__)
+        except AttributeError:
+            raise TypeError(
+                f"No '__dict__' attribute on {type(instance).__name__!r} instance "
+                f"to cache {self.attrname!r} property"
+            ) from None
+
+    async def _load(self, instance: t.Any, cache: dict[str | None, t.Any]) -> t.Any:
+        import asyncio
+
+        # Loads are only shared between awaiters on the same event loop.
+        loop = asyncio.get_running_loop()
+        key = (id(instance), id(loop))
+        pending = self._pending.get(key)
+
+        if pending is None:
+            if not self.coro:
+                raise errors.NoAsyncImplementation(self.func)
+
+            _log.debug(f"Computing {self.coro.__qualname__!r} (async)")
+            pending = loop.create_task(self.coro(instance))
+            pending.add_done_callback(lambda task: self._loaded(task, key, cache))
+            self._pending[key] = pending
+
+        # The load runs in its own task, and is shielded so a cancelled
+        # awaiter (even the one which started it) doesn't cancel it for
+        # everyone else.
+        return await asyncio.shield(pending)
+
+    def _loaded(
+        self,
+        task: asyncio.Future[t.Any],
+        key: tuple[int, int],
+        cache: dict[str | None, t.Any],
+    ) -> None:
+        # The value may have been invalidated while loading.
+        if self._pending.get(key) is not task:
+            return
+
+        del self._pending[key]
+        # Retrieving the exception also stops it being reported if
+        # nobody was left waiting on it.
+        if not task.cancelled() and task.exception() is None:
+            cache[self.attrname] = task.result()
@@ -0,0 +1,137 @@
+# Copyright (c) 2022-present, Ethan Henderson
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from __future__ import annotations
+
+import threading
+import typing as t
+from collections import deque
+
+from xsync import errors
+
+if t.TYPE_CHECKING:
+    from xsync.breakers import CircuitBreaker
+    from xsync.limits import Limiter
+
+_LATENCY_SAMPLES = 200
+
+
+class HybridStats:
+    """Statistics for a single hybrid callable.
+
+    These are only recorded by the options that need them, so a hybrid
+    without any options will have no statistics.
+    """
+
+    def __init__(self, qualname: str) -> None:
+        self.qualname = qualname
+        self.hedged_calls = 0
+        self.calls_hedged = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.blocking_calls = 0
+        self.blocking_time = 0.0
+        self.latencies: deque[float] = deque(maxlen=_LATENCY_SAMPLES)
+        self.limiter: Limiter | None = None
+        self.breaker: CircuitBreaker | None = None
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"<HybridStats {self.qualname!r} {self.as_dict()}>"
+
+    @property
+    def hedge_rate(self) -> float:
+        """The proportion of hedge-enabled calls which launched at least
+        one hedge.
+        """
+
+        return self.calls_hedged / self.hedged_calls if self.hedged_calls else 0.0
+
+    @property
+    def hedge_win_rate(self) -> float:
+        """The proportion of hedges which returned before the original
+        call.
+        """
+
+        return self.hedge_wins / self.hedges if self.hedges else 0.0
+
+    def percentile(self, pct: float) -> float | None:
+        """Return the given percentile of recently observed latencies,
+        in seconds, or `None` if none have been observed.
+        """
+
+        with self._lock:
+            samples = sorted(self.latencies)
+
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+    def as_dict(self) -> dict[str, t.Any]:
+        stats: dict[str, t.Any] = {
+            "hedged_calls": self.hedged_calls,
+            "hedges": self.hedges,
+            "hedge_rate": self.hedge_rate,
+            "hedge_win_rate": self.hedge_win_rate,
+            "blocking_calls": self.blocking_calls,
+            "blocking_time": self.blocking_time,
+        }
+
+        if self.limiter is not None:
+            stats["limiter"] = self.limiter.as_dict()
+        if self.breaker is not None:
+            stats["breaker"] = self.breaker.as_dict()
+
+        return stats
+
+    def record_blocking(self, elapsed: float) -> None:
+        with self._lock:
+            self.blocking_calls += 1
+            self.blocking_time += elapsed
+
+    def record_latency(self, latency: float) -> None:
+        with self._lock:
+            self.latencies.append(latency)
+
+    def record_hedging(self, hedges: int, won: bool) -> None:
+        with self._lock:
+            self.hedged_calls += 1
+            self.hedges += hedges
+            if hedges:
+                self.calls_hedged += 1
+            if won:
+                self.hedge_wins += 1
+
+
+def get_stats(func: t.Callable[..., t.Any]) -> HybridStats:
+    """Return the statistics for a hybrid callable."""
+
+    stats = getattr(getattr(func, "__func__", func), "__xsync_stats__", None)
+    if stats is None:
+        raise errors.NotHybridCallable(func)
+    return t.cast(HybridStats, stats)
@@ -0,0 +1,238 @@
+# Copyright (c) 2022-present, Ethan Henderson
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from __future__ import annotations
+
+import threading
+import time
+import typing as t
+from contextvars import ContextVar, copy_context
+from functools import wraps
+
+from xsync import backends, errors
+
+if t.TYPE_CHECKING:
+    from concurrent.futures import ThreadPoolExecutor
+    from contextvars import Token
+    from types import TracebackType
+
+    from xsync.types import CallT, FuncT
+
+# The absolute (monotonic) time by which the current operation should
+# complete, and the deadline already being enforced by an outer call.
+_deadline: ContextVar[float | None] = ContextVar("xsync_deadline", default=None)
+_enforced: ContextVar[float | None] = ContextVar("xsync_enforced", default=None)
+
+# Tokens for resetting the deadline, kept per context rather than on the
+# `deadline`, so one can be shared by several tasks at once.
+_resets: ContextVar[tuple[Token[float | None], ...]] = ContextVar(
+    "xsync_resets", default=()
+)
+
+# Set once a deadline has been used anywhere, so hybrids without their
+# own timeout can skip checking the context until then.
+active = False
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+class deadline:
+    """A context manager which bounds the time hybrid callables within
+    it have to complete, whether they run synchronously or
+    asynchronously.
+
+    Deadlines nest: an inner deadline can only shorten the time
+    available, and nested hybrid calls get whatever time remains rather
+    than their own full timeout.
+    """
+
+    __slots__ = ("seconds",)
+
+    def __init__(self, seconds: float) -> None:
+        self.seconds = seconds
+
+    def __enter__(self) -> deadline:
+        global active
+        active = True
+
+        at = time.monotonic() + self.seconds
+        current = _deadline.get()
+        if current is not None and current < at:
+            at = current
+
+        _resets.set((*_resets.get(), _deadline.set(at)))
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        *resets, token = _resets.get()
+        _deadline.reset(token)
+        _resets.set(tuple(resets))
+
+    async def __aenter__(self) -> deadline:
+        return self.__enter__()
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.__exit__(exc_type, exc_value, traceback)
+
+
+def remaining() -> float | None:
+    """Return the number of seconds left before the current deadline, or
+    `None` if there isn't one.
+    """
+
+    at = _deadline.get()
+    return None if at is None else at - time.monotonic()
+
+
+def deadline_for(timeout: float | None) -> float | None:
+    at = _deadline.get()
+
+    if timeout is not None:
+        own = time.monotonic() + timeout
+        if at is None or own < at:
+            at = own
+
+    if at is None:
+        return None
+
+    # An outer call is already enforcing a deadline at least as tight,
+    # so there's no need to enforce it again.
+    enforced = _enforced.get()
+    if enforced is not None and at >= enforced:
+        return None
+
+    return at
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+
+    if _executor is None:
+        from concurrent.futures import ThreadPoolExecutor
+
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(thread_name_prefix="xsync")
+
+    return _executor
+
+
+def _run_bounded(
+    func: FuncT, args: tuple[t.Any, ...], kwargs: dict[str, t.Any], at: float
+) -> t.Any:
+    _deadline.set(at)
+    _enforced.set(at)
+    return func(*args, **kwargs)
+
+
+def _run_sync(
+    func: FuncT, args: tuple[t.Any, ...], kwargs: dict[str, t.Any], at: float
+) -> t.Any:
+    from concurrent.futures import TimeoutError
+
+    budget = at - time.monotonic()
+    if budget <= 0:
+        raise errors.DeadlineExceeded(func)
+
+    # The function is run in another thread so the caller can stop
+    # waiting for it. The thread can't be interrupted though, so it will
+    # carry on in the background until it finishes.
+    ctx = copy_context()
+    fut = _get_executor().submit(ctx.run, _run_bounded, func, args, kwargs, at)
+
+    try:
+        return fut.result(budget)
+    except TimeoutError:
+        if not fut.done():
+            raise errors.DeadlineExceeded(func) from None
+        raise
+
+
+async def _run_async(
+    call: CallT,
+    impl: FuncT,
+    args: tuple[t.Any, ...],
+    kwargs: dict[str, t.Any],
+    at: float,
+) -> t.Any:
+    budget = at - time.monotonic()
+    if budget <= 0:
+        raise errors.DeadlineExceeded(impl)
+
+    deadline_token = _deadline.set(at)
+    enforced_token = _enforced.set(at)
+
+    try:
+        # The implementation is only called once the deadline has been
+        # set, so it's visible to anything it calls.
+        return await backends.current().wait_for(call(impl, args, kwargs), budget)
+    except TimeoutError:
+        if time.monotonic() < at:
+            raise
+        raise errors.DeadlineExceeded(impl) from None
+    finally:
+        _enforced.reset(enforced_token)
+        _deadline.reset(deadline_token)
+
+
+def bound_sync(func: FuncT, timeout: float | None) -> FuncT:
+    @wraps(func)
+    def bounded(*args: t.Any, **kwargs: t.Any) -> t.Any:
+        if timeout is not None or active:
+            at = deadline_for(timeout)
+            if at is not None:
+                return _run_sync(func, args, kwargs, at)
+
+        return func(*args, **kwargs)
+
+    return bounded
+
+
+def bound_async(call: CallT, timeout: float | None) -> CallT:
+    def bounded(
+        impl: FuncT, args: tuple[t.Any, ...], kwargs: dict[str, t.Any]
+    ) -> t.Any:
+        if timeout is not None or active:
+            at = deadline_for(timeout)
+            if at is not None:
+                return _run_async(call, impl, args, kwargs, at)
+
+        return call(impl, args, kwargs)
+
+    return bounded
@@ -34,3 +34,5 @@ if t.TYPE_CHECKING:
     FuncT = t.Callable[..., t.Any]
     DecoT = t.Callable[[FuncT], FuncT]
     MappingT = dict[str, t.Callable[..., t.Any] | None]
+    ClassT = t.TypeVar("ClassT", bound=type)
+    CallT = t.Callable[[FuncT, tuple[t.Any, ...], dict[str, t.Any]], t.Any]
@@ -35,9 +35,38 @@ from functools import wraps
 from types import FunctionType
 
 if t.TYPE_CHECKING:
+    import logging
+    from types import CodeType, FrameType
+
     from xsync.types import DecoT, FuncT
 
-warnings.simplefilter("once", DeprecationWarning)
+_CO_COROUTINE = 0x80
+_AWAITED_CACHE_SIZE = 4096
+_awaited: dict[tuple[CodeType, int], bool] = {}
+
+# Call sites classified ahead of time by `xsync.analyse`, keyed by file,
+# code object name, and line.
+_index: dict[tuple[str, str, int], bool] | None = None
+
+
+class _LazyLogger:
+    # Importing `logging` accounts for a large part of the import time,
+    # so it is deferred until something is first logged. Looked up
+    # attributes are stored on the instance so later calls go straight
+    # to the real logger.
+    def __init__(self, name: str) -> None:
+        self._name = name
+
+    def __getattr__(self, attr: str) -> t.Any:
+        import logging
+
+        value = getattr(logging.getLogger(self._name), attr)
+        setattr(self, attr, value)
+        return value
+
+
+def get_logger(name: str) -> logging.Logger:
+    return t.cast("logging.Logger", _LazyLogger(name))
 
 
 def get_qualname(func: FuncT, coro: FuncT | None = None) -> str:
@@ -60,9 +89,66 @@ def deprecated(removal_version: str = "", replaced_with: str = "") -> DecoT:
             if replaced_with:
                 msg += f" -- consider using {replaced_with!r} instead"
 
-            warnings.warn(msg, DeprecationWarning)
+            warnings.warn(msg, DeprecationWarning, stacklevel=2)
             return func(*args, **kwargs)
 
         return wrapper
 
     return decorator
+
+
+def is_coroutine_function(func: t.Any) -> bool:
+    code = getattr(func, "__code__", None)
+    return code is not None and bool(code.co_flags & _CO_COROUTINE)
+
+
+def is_awaited(frame: FrameType) -> bool:
+    # Source lines don't change under a running code object, so the
+    # result for each call site only needs to be worked out once.
+    key = (frame.f_code, frame.f_lineno)
+
+    try:
+        return _awaited[key]
+    except KeyError:
+        pass
+
+    awaited = None
+    if _index is not None:
+        code = frame.f_code
+        name = code.co_qualname if sys.version_info >= (3, 11) else code.co_name
+        awaited = _index.get((code.co_filename, name, frame.f_lineno))
+
+    if awaited is None:
+        import linecache
+
+        line = linecache.getline(
+            frame.f_code.co_filename, frame.f_lineno, frame.f_globals
+        )
+        awaited = "await" in line
+
+    if len(_awaited) >= _AWAITED_CACHE_SIZE:
+        _awaited.clear()
+
+    _awaited[key] = awaited
+    return awaited
+
+
+async def maybe_await(value: t.Any) -> t.Any:
+    if hasattr(value, "__await__"):
+        return await value
+    return value
+
+
+class Ready:
+    """An awaitable which resolves to an already known value without
+    suspending.
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: t.Any) -> None:
+        self.value = value
+
+    def __await__(self) -> t.Generator[t.Any, None, t.Any]:
+        return self.value
+        yield